@@ -1,4 +1,4 @@
-from .analyst_agent import run_analyst
+from .analyst_agent import run_analyst, run_analyst_batch
 from .tutor_agent import run_tutor
 
-__all__ = ["run_analyst", "run_tutor"]
+__all__ = ["run_analyst", "run_analyst_batch", "run_tutor"]
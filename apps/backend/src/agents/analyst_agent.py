@@ -1,14 +1,17 @@
 """Analyst Agent: Deep analysis of a trade for educational purposes."""
 
-import base64
-import json
+import asyncio
+import hashlib
 from typing import Optional
 
-from google import genai
+import orjson
 from google.genai import types
 
 from models.schemas import TradePayload, AnalystOutput
 
+from .gemini import GEMINI_MODEL, call_with_system_prompt, get_client, json_object_schema, parse_json_response
+from .response_cache import ResponseCache, cache_key
+
 
 ANALYST_SYSTEM_PROMPT = """You are an expert trading analyst for a personalised education platform. Your role is to analyse trades objectively and extract insights that help traders learn—never to judge or promise profits.
 
@@ -19,7 +22,7 @@ ANALYST_SYSTEM_PROMPT = """You are an expert trading analyst for a personalised
 - If chart/image is provided: reference price action, entry/exit ticks, and visual context
 
 ## Output format (JSON)
-Return ONLY valid JSON in this exact structure:
+Return ONLY valid JSON in this exact structure and key order (trade_analysis must come first):
 {
   "trade_analysis": "2-4 paragraph analysis covering: (1) what the trade was, (2) key factors that influenced outcome, (3) how strategy/risk/exit choices played out",
   "key_factors": ["factor1", "factor2", "factor3"],
@@ -30,53 +33,212 @@ Return ONLY valid JSON in this exact structure:
 If behavioral_summary is present, use it to add context (e.g. "3rd trade in run, recent outcomes: win, loss, win") but never use it to belittle or predict future results.
 """
 
+# 2-4 paragraphs plus a short list; the cap keeps runaway generations off the critical path
+ANALYST_MAX_OUTPUT_TOKENS = 1024
+# trade_analysis first so the Tutor can start while the rest is still streaming
+ANALYST_RESPONSE_SCHEMA = json_object_schema(
+    trade_analysis=types.Schema(type=types.Type.STRING),
+    key_factors=types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
+    win_loss_assessment=types.Schema(type=types.Type.STRING),
+)
+
+# Trades per batched request: 8 x ANALYST_MAX_OUTPUT_TOKENS stays within the 8192-token output limit
+ANALYST_BATCH_SIZE = 8
+ANALYST_BATCH_RESPONSE_SCHEMA = types.Schema(type=types.Type.ARRAY, items=ANALYST_RESPONSE_SCHEMA)
+
+# Re-analysing an identical trade (same payload and chart) skips the Gemini round-trip
+_analyst_cache: ResponseCache[AnalystOutput] = ResponseCache()
+
 
 def _build_analyst_prompt(payload: TradePayload) -> str:
     parts = [
         "## Trade data (JSON)\n```json\n",
-        payload.model_dump_json(indent=2),
+        payload.json_blob,  # compact: indentation only costs input tokens
         "\n```\n\nAnalyse this trade and return the JSON output.",
     ]
     return "".join(parts)
 
 
-def _mime_for_image(img_bytes: bytes) -> str:
-    """Detect MIME type from image bytes (PNG/JPEG)."""
-    if img_bytes[:8] == b"\x89PNG\r\n\x1a\n":
-        return "image/png"
-    if img_bytes[:2] == b"\xff\xd8" or img_bytes[6:10] in (b"JFIF", b"Exif"):
-        return "image/jpeg"
-    return "image/png"
+def _build_analyst_batch_prompt(payloads: list[TradePayload]) -> str:
+    parts = ["## Trades (JSON array)\n```json\n["]
+    parts.append(",".join(p.json_blob for p in payloads))
+    parts.append(
+        "]\n```\n\nAnalyse each trade independently and return a JSON array with one output object "
+        "per trade, in the same order as the input."
+    )
+    return "".join(parts)
 
 
-def run_analyst(
+def _analyst_cache_key(payload: TradePayload, chart_image: Optional[bytes] = None) -> str:
+    return cache_key(
+        GEMINI_MODEL.encode(),
+        payload.json_blob.encode(),
+        hashlib.sha256(chart_image).digest() if chart_image else b"",
+    )
+
+
+class _StringFieldScanner:
+    """Finds JSON string *field* in streamed text, looking at each chunk only once.
+
+    Before the value opens only a short tail (enough for a split key) is kept; inside the
+    value, chunks are scanned for an unescaped closing quote, carrying a trailing
+    backslash across chunk boundaries.
+    """
+
+    def __init__(self, field: str):
+        self._key = f'"{field}"'
+        self._head = ""  # text from the key onwards, or a tail that may hold part of it
+        self._keyed = False
+        self._value: Optional[list[str]] = None  # raw value pieces once inside the string
+        self._escaped = False  # value so far ends on an unpaired backslash
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume the next chunk; return the decoded value once its closing quote arrives, else None."""
+        if self._value is None:
+            chunk = self._open(chunk)
+            if chunk is None:
+                return None
+        pos = 0
+        while True:
+            end = chunk.find('"', pos)
+            if end == -1:
+                self._value.append(chunk)
+                run = len(chunk) - len(chunk.rstrip("\\"))
+                self._escaped = (self._escaped if run == len(chunk) else False) ^ (run % 2 == 1)
+                return None
+            backslashes = 0
+            while backslashes < end and chunk[end - 1 - backslashes] == "\\":
+                backslashes += 1
+            if (backslashes + (self._escaped and backslashes == end)) % 2 == 0:
+                self._value.append(chunk[:end])
+                return orjson.loads(f'"{"".join(self._value)}"')
+            pos = end + 1
+
+    def _open(self, chunk: str) -> Optional[str]:
+        """Advance towards the value's opening quote; return the text after it once found."""
+        self._head += chunk
+        if not self._keyed:
+            key = self._head.find(self._key)
+            if key == -1:
+                self._head = self._head[-(len(self._key) - 1) :]
+                return None
+            self._head = self._head[key + len(self._key) :]
+            self._keyed = True
+        colon = self._head.find(":")
+        if colon == -1:
+            return None
+        start = self._head.find('"', colon + 1)
+        if start == -1 or self._head[colon + 1 : start].strip():
+            return None
+        self._value = []
+        rest, self._head = self._head[start + 1 :], ""
+        return rest
+
+
+def _completed_string_field(text: str, field: str) -> Optional[str]:
+    """Return the decoded value of JSON string *field* once its closing quote has streamed in, else None."""
+    return _StringFieldScanner(field).feed(text)
+
+
+async def run_analyst(
     payload: TradePayload,
-    chart_image_b64: Optional[str] = None,
+    chart_image: Optional[bytes] = None,
+    chart_mime: str = "image/png",
     api_key: Optional[str] = None,
+    trade_analysis_ready: Optional[asyncio.Future] = None,
 ) -> AnalystOutput:
-    """Run Analyst Agent on trade payload and optional chart screenshot."""
-    client = genai.Client(api_key=api_key) if api_key else genai.Client()
+    """Run Analyst Agent on trade payload and optional chart screenshot.
+
+    The response is streamed; if *trade_analysis_ready* is given it is resolved with the
+    trade_analysis text as soon as that field is complete, so the Tutor can start early.
+    """
+    key = _analyst_cache_key(payload, chart_image)
+    cached = _analyst_cache.get(key)
+    if cached is not None:
+        if trade_analysis_ready is not None and not trade_analysis_ready.done():
+            trade_analysis_ready.set_result(cached.trade_analysis)
+        return cached
+
+    client = get_client(api_key)
     user_content = _build_analyst_prompt(payload)
 
-    if chart_image_b64:
-        img_data = base64.b64decode(chart_image_b64)
-        mime = _mime_for_image(img_data)
-        contents = [user_content, types.Part.from_bytes(data=img_data, mime_type=mime)]
+    if chart_image:
+        contents = [user_content, types.Part.from_bytes(data=chart_image, mime_type=chart_mime)]
     else:
         contents = [user_content]
 
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=contents,
-        config=types.GenerateContentConfig(system_instruction=ANALYST_SYSTEM_PROMPT),
+    async def _stream(config: types.GenerateContentConfig) -> str:
+        stream = await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config,
+        )
+        chunks: list[str] = []
+        scanner = _StringFieldScanner("trade_analysis") if trade_analysis_ready is not None else None
+        async for chunk in stream:
+            if not chunk.text:
+                continue
+            chunks.append(chunk.text)
+            if scanner is not None and not trade_analysis_ready.done():
+                trade_analysis = scanner.feed(chunk.text)
+                if trade_analysis is not None:
+                    trade_analysis_ready.set_result(trade_analysis)
+        return "".join(chunks)
+
+    text = await call_with_system_prompt(
+        client,
+        ANALYST_SYSTEM_PROMPT,
+        _stream,
+        max_output_tokens=ANALYST_MAX_OUTPUT_TOKENS,
+        response_schema=ANALYST_RESPONSE_SCHEMA,
     )
-    text = response.text.strip()
+    data = parse_json_response(text)
+    output = AnalystOutput(**data)
+    _analyst_cache.set(key, output)
+    return output
 
-    # Extract JSON (handle markdown code blocks)
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0].strip()
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0].strip()
 
-    data = json.loads(text)
-    return AnalystOutput(**data)
+async def run_analyst_batch(
+    payloads: list[TradePayload],
+    api_key: Optional[str] = None,
+) -> list[AnalystOutput]:
+    """Run Analyst Agent on several trades (no charts), ANALYST_BATCH_SIZE trades per Gemini call.
+
+    Outputs are returned in input order; trades already in the response cache are not re-sent.
+    """
+    keys = [_analyst_cache_key(p) for p in payloads]
+    outputs: list[Optional[AnalystOutput]] = [_analyst_cache.get(k) for k in keys]
+    pending = [i for i, output in enumerate(outputs) if output is None]
+    if not pending:
+        return outputs
+
+    client = get_client(api_key)
+
+    async def _analyse_chunk(indices: list[int]) -> None:
+        contents = _build_analyst_batch_prompt([payloads[i] for i in indices])
+
+        async def _generate(config: types.GenerateContentConfig) -> types.GenerateContentResponse:
+            return await client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config=config,
+            )
+
+        response = await call_with_system_prompt(
+            client,
+            ANALYST_SYSTEM_PROMPT,
+            _generate,
+            max_output_tokens=ANALYST_MAX_OUTPUT_TOKENS * len(indices),
+            response_schema=ANALYST_BATCH_RESPONSE_SCHEMA,
+        )
+        data = parse_json_response(response.text)
+        if not isinstance(data, list) or len(data) != len(indices):
+            raise ValueError(f"Analyst batch output does not match the {len(indices)} trades sent")
+        for i, item in zip(indices, data):
+            outputs[i] = AnalystOutput(**item)
+            _analyst_cache.set(keys[i], outputs[i])
+
+    await asyncio.gather(
+        *(_analyse_chunk(pending[i : i + ANALYST_BATCH_SIZE]) for i in range(0, len(pending), ANALYST_BATCH_SIZE))
+    )
+    return outputs
@@ -0,0 +1,181 @@
+"""Shared Gemini plumbing for the Analyst and Tutor agents: client, model, generation config and prompt caching."""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import orjson
+from google import genai
+from google.genai import errors, types
+
+from .ratelimit import gemini_limiter
+
+log = logging.getLogger("agent_analysis.agents.gemini")
+
+T = TypeVar("T")
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_TEMPERATURE = 0.2
+
+
+@lru_cache(maxsize=8)
+def get_client(api_key: Optional[str] = None) -> genai.Client:
+    """Shared client per API key, so its HTTP connection pool and auth setup are reused across calls."""
+    return genai.Client(api_key=api_key) if api_key else genai.Client()
+
+
+# Static system prompts are registered once with the Gemini cache API and referenced by name,
+# so they are not re-sent (and re-prefilled) on every call.
+CACHE_TTL_SECONDS = 3600
+# Recreate slightly before the server-side TTL so calls never reference an expired cache
+_REFRESH_MARGIN_SECONDS = 60
+
+# 429s are retried (after the limiter's pause) this many times before surfacing
+_THROTTLE_RETRIES = 2
+
+_caches: dict[tuple[str, str], tuple[str, float]] = {}  # (model, prompt) -> (cache name, expires at)
+_uncacheable: set[tuple[str, str]] = set()
+# In-flight creations, so concurrent callers for the same prompt share one request
+_pending: dict[tuple[str, str], asyncio.Task] = {}
+
+
+async def _create_cache(client: genai.Client, model: str, system_instruction: str) -> Optional[str]:
+    key = (model, system_instruction)
+    try:
+        cache = await client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                ttl=f"{CACHE_TTL_SECONDS}s",
+            ),
+        )
+    except errors.ClientError as e:
+        if e.code == 400:
+            # e.g. prompt below the model's minimum cacheable size: stop trying for this prompt
+            log.info("Context caching unavailable for %s, sending system prompt inline: %s", model, e)
+            _uncacheable.add(key)
+        else:
+            log.warning("Context cache creation failed (%s), sending system prompt inline: %s", e.code, e)
+        return None
+    except errors.APIError as e:
+        log.warning("Context cache creation failed, sending system prompt inline: %s", e)
+        return None
+    _caches[key] = (cache.name, time.monotonic() + CACHE_TTL_SECONDS)
+    return cache.name
+
+
+async def _cached_content_name(client: genai.Client, model: str, system_instruction: str) -> Optional[str]:
+    """Return the cache name for this system prompt, creating it if needed. None if caching is unavailable."""
+    key = (model, system_instruction)
+    if key in _uncacheable:
+        return None
+    entry = _caches.get(key)
+    if entry and entry[1] - _REFRESH_MARGIN_SECONDS > time.monotonic():
+        return entry[0]
+    task = _pending.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_create_cache(client, model, system_instruction))
+        _pending[key] = task
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+    # Shielded so one caller being cancelled does not abort the creation the others are awaiting
+    return await asyncio.shield(task)
+
+
+# Markdown code fence around a JSON body, tolerant of ```JSON / ``` json / bare ```
+_FENCE_RE = re.compile(r"```\s*(?:json)?\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+
+
+def parse_json_response(text: str) -> Any:
+    """Parse a JSON response body, unwrapping a markdown code fence if the model added one."""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        m = _FENCE_RE.search(text)
+        if m is None:
+            raise
+        return orjson.loads(m.group(1))
+
+
+def json_object_schema(**properties: types.Schema) -> types.Schema:
+    """Response schema for a JSON object whose properties are all required and emitted in the given order."""
+    return types.Schema(
+        type=types.Type.OBJECT,
+        properties=properties,
+        required=list(properties),
+        property_ordering=list(properties),
+    )
+
+
+def _generation_settings(model: str, max_output_tokens: int, response_schema: types.Schema) -> dict:
+    """Native JSON output plus latency-oriented settings: capped outputs and, on 2.5 Flash, no thinking."""
+    settings = {
+        "max_output_tokens": max_output_tokens,
+        "temperature": GEMINI_TEMPERATURE,
+        "response_mime_type": "application/json",
+        "response_schema": response_schema,
+    }
+    if model.startswith("gemini-2.5-flash"):
+        settings["thinking_config"] = types.ThinkingConfig(thinking_budget=0)
+    return settings
+
+
+async def system_prompt_config(
+    client: genai.Client,
+    system_instruction: str,
+    max_output_tokens: int,
+    response_schema: types.Schema,
+    model: str = GEMINI_MODEL,
+) -> types.GenerateContentConfig:
+    """GenerateContentConfig that references the cached system prompt, or inlines it when uncached."""
+    settings = _generation_settings(model, max_output_tokens, response_schema)
+    name = await _cached_content_name(client, model, system_instruction)
+    if name:
+        return types.GenerateContentConfig(cached_content=name, **settings)
+    return types.GenerateContentConfig(system_instruction=system_instruction, **settings)
+
+
+async def _throttled_call(
+    call: Callable[[types.GenerateContentConfig], Awaitable[T]],
+    config: types.GenerateContentConfig,
+    tokens_estimate: int,
+) -> T:
+    """Run *call* under the shared rate limiter, retrying 429s once admissions resume."""
+    attempt = 0
+    while True:
+        try:
+            async with gemini_limiter.wait_if_throttled(tokens_estimate):
+                return await call(config)
+        except errors.ClientError as e:
+            if e.code != 429 or attempt == _THROTTLE_RETRIES:
+                raise
+        attempt += 1
+
+
+async def call_with_system_prompt(
+    client: genai.Client,
+    system_instruction: str,
+    call: Callable[[types.GenerateContentConfig], Awaitable[T]],
+    max_output_tokens: int,
+    response_schema: types.Schema,
+    model: str = GEMINI_MODEL,
+) -> T:
+    """Run *call* with a system-prompt config; recreate the cache and retry once if it has expired.
+
+    Calls go through the shared RPM/TPM + AIMD limiter; the token estimate is the output cap
+    plus roughly 4 characters per token of system prompt.
+    """
+    tokens_estimate = max_output_tokens + len(system_instruction) // 4
+    config = await system_prompt_config(client, system_instruction, max_output_tokens, response_schema, model)
+    try:
+        return await _throttled_call(call, config, tokens_estimate)
+    except errors.ClientError as e:
+        if config.cached_content is None or e.code not in (403, 404):
+            raise
+        log.info("Context cache %s rejected (%s), recreating", config.cached_content, e.code)
+        _caches.pop((model, system_instruction), None)
+        config = await system_prompt_config(client, system_instruction, max_output_tokens, response_schema, model)
+        return await _throttled_call(call, config, tokens_estimate)
@@ -0,0 +1,144 @@
+"""Client-side throttling for Gemini calls: RPM/TPM sliding window plus AIMD concurrency control."""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from google.genai import errors
+
+log = logging.getLogger("agent_analysis.agents.ratelimit")
+
+# Project quota; override per deployment tier
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "1000"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+# Calls slower than this count as congestion and shrink the concurrency limit
+GEMINI_LATENCY_TARGET_SECONDS = float(os.getenv("GEMINI_LATENCY_TARGET_MS", "10000")) / 1000
+
+# Pause applied after a 429 that carries no retry delay
+_DEFAULT_RETRY_AFTER_SECONDS = 2.0
+_WINDOW_SECONDS = 60.0
+
+
+class SlidingWindowLimiter:
+    """Admits a call only while the last minute's requests and tokens stay under rpm/tpm."""
+
+    def __init__(self, rpm: int, tpm: int, window: float = _WINDOW_SECONDS):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events: deque[tuple[float, int]] = deque()  # (admitted at, tokens)
+        self._tokens = 0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()  # FIFO admission
+
+    def pause_for(self, seconds: float) -> None:
+        """Hold all admissions for *seconds* (e.g. from a 429 retry delay)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: int) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._events and self._events[0][0] <= now - self.window:
+                    self._tokens -= self._events.popleft()[1]
+                wait = self._paused_until - now
+                if wait <= 0:
+                    # An oversized request is still admitted once the window is empty
+                    if not self._events or (len(self._events) < self.rpm and self._tokens + tokens <= self.tpm):
+                        self._events.append((now, tokens))
+                        self._tokens += tokens
+                        return
+                    wait = self._events[0][0] + self.window - now
+                await asyncio.sleep(wait)
+
+
+class AIMDConcurrency:
+    """Concurrency limit that grows additively on fast successes and shrinks multiplicatively on congestion."""
+
+    def __init__(
+        self,
+        c_min: int = 1,
+        c_max: int = 16,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        latency_target: float = GEMINI_LATENCY_TARGET_SECONDS,
+    ):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.alpha = alpha
+        self.beta = beta
+        self.latency_target = latency_target
+        self._limit = float(c_max)
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, latency: float, throttled: bool) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            if throttled or latency > self.latency_target:
+                self._limit = max(float(self.c_min), self._limit * self.beta)
+            else:
+                self._limit = min(float(self.c_max), self._limit + self.alpha)
+            self._cond.notify_all()
+
+
+def retry_after_seconds(e: errors.APIError) -> Optional[float]:
+    """Server-suggested retry delay from a Retry-After header or google.rpc.RetryInfo detail, if any."""
+    headers = getattr(e.response, "headers", None)
+    if headers and headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    body = e.details.get("error", {}) if isinstance(e.details, dict) else {}
+    for detail in body.get("details") or []:
+        if isinstance(detail, dict) and detail.get("@type", "").endswith("RetryInfo"):
+            delay = str(detail.get("retryDelay", "")).rstrip("s")
+            try:
+                return float(delay)
+            except ValueError:
+                return None
+    return None
+
+
+class RateLimiter:
+    """Sliding-window quota plus AIMD concurrency around each Gemini call."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.window = SlidingWindowLimiter(rpm, tpm)
+        self.concurrency = AIMDConcurrency()
+
+    @asynccontextmanager
+    async def wait_if_throttled(self, tokens_estimate: int) -> AsyncIterator[None]:
+        """Wait for quota and a concurrency slot; on 429, pause admissions for the server's retry delay."""
+        await self.window.acquire(tokens_estimate)
+        await self.concurrency.acquire()
+        start = time.monotonic()
+        throttled = False
+        try:
+            yield
+        except errors.ClientError as e:
+            if e.code == 429:
+                throttled = True
+                delay = retry_after_seconds(e) or _DEFAULT_RETRY_AFTER_SECONDS
+                log.warning("Gemini rate limited, pausing %.1fs (concurrency limit %d)", delay, self.concurrency.limit)
+                self.window.pause_for(delay)
+            raise
+        finally:
+            await self.concurrency.release(time.monotonic() - start, throttled)
+
+
+gemini_limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM)
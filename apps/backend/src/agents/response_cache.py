@@ -0,0 +1,45 @@
+"""In-process response cache for agent outputs, keyed on an exact hash of the prompt inputs."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+RESPONSE_CACHE_TTL_SECONDS = 3600
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+
+
+def cache_key(*parts: bytes) -> str:
+    """Stable digest of the given inputs; parts are length-prefixed so boundaries cannot collide."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class ResponseCache(Generic[T]):
+    """Bounded LRU with per-entry expiry. Cached outputs are shared, so callers must not mutate them."""
+
+    def __init__(self, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[T]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: T) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
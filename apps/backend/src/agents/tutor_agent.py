@@ -1,13 +1,14 @@
 """Tutor Agent: Turn Analyst output into educational explanations."""
 
-import json
 from typing import Optional
 
-from google import genai
 from google.genai import types
 
 from models.schemas import TradePayload, AnalystOutput, TutorOutput
 
+from .gemini import GEMINI_MODEL, call_with_system_prompt, get_client, json_object_schema, parse_json_response
+from .response_cache import ResponseCache, cache_key
+
 
 TUTOR_SYSTEM_PROMPT = """You are an AI trading tutor. Your job is to turn a trade analysis into clear, memorable educational content.
 
@@ -25,16 +26,29 @@ Return ONLY valid JSON:
 }
 """
 
+TUTOR_MAX_OUTPUT_TOKENS = 800
+TUTOR_RESPONSE_SCHEMA = json_object_schema(
+    explanation=types.Schema(type=types.Type.STRING),
+    learning_points=types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
+)
+
+_tutor_cache: ResponseCache[TutorOutput] = ResponseCache()
+
 
 def _build_tutor_prompt(analyst_output: AnalystOutput, payload: TradePayload) -> str:
+    # key_factors / win_loss_assessment are empty when Tutor starts from a streamed Analyst draft
+    summary = ""
+    if analyst_output.key_factors:
+        summary += f"Key factors: {', '.join(analyst_output.key_factors)}\n"
+    if analyst_output.win_loss_assessment:
+        summary += f"Win/loss assessment: {analyst_output.win_loss_assessment}\n"
+    if summary:
+        summary += "\n"
     return f"""## Analyst analysis
 
 {analyst_output.trade_analysis}
 
-Key factors: {', '.join(analyst_output.key_factors)}
-Win/loss assessment: {analyst_output.win_loss_assessment}
-
-## Trade context
+{summary}## Trade context
 - Contract: {payload.contract.contract_type} ({payload.contract.shortcode})
 - P/L: {payload.contract.profit} {payload.contract.currency}
 - Entry: {payload.contract.entry_tick or 'N/A'} → Exit: {payload.contract.exit_tick or 'N/A'}
@@ -42,24 +56,35 @@ Win/loss assessment: {analyst_output.win_loss_assessment}
 Turn this into an educational explanation for the trader. Return JSON only."""
 
 
-def run_tutor(
+async def run_tutor(
     analyst_output: AnalystOutput,
     payload: TradePayload,
     api_key: Optional[str] = None,
 ) -> TutorOutput:
     """Run Tutor Agent on Analyst output."""
-    client = genai.Client(api_key=api_key) if api_key else genai.Client()
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=_build_tutor_prompt(analyst_output, payload),
-        config=types.GenerateContentConfig(system_instruction=TUTOR_SYSTEM_PROMPT),
+    contents = _build_tutor_prompt(analyst_output, payload)
+    key = cache_key(GEMINI_MODEL.encode(), contents.encode())
+    cached = _tutor_cache.get(key)
+    if cached is not None:
+        return cached
+
+    client = get_client(api_key)
+
+    async def _generate(config: types.GenerateContentConfig) -> types.GenerateContentResponse:
+        return await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config,
+        )
+
+    response = await call_with_system_prompt(
+        client,
+        TUTOR_SYSTEM_PROMPT,
+        _generate,
+        max_output_tokens=TUTOR_MAX_OUTPUT_TOKENS,
+        response_schema=TUTOR_RESPONSE_SCHEMA,
     )
-    text = response.text.strip()
-
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0].strip()
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0].strip()
-
-    data = json.loads(text)
-    return TutorOutput(**data)
+    data = response.parsed if isinstance(response.parsed, dict) else parse_json_response(response.text)
+    output = TutorOutput(**data)
+    _tutor_cache.set(key, output)
+    return output
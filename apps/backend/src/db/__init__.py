@@ -1,7 +1,7 @@
 """Database layer: engine, models, and crud for transactions and analysis results."""
 
 from db.engine import get_engine, get_session_factory, init_db
-from db.models import Base, Transaction, AnalysisResult
+from db.models import Base, Transaction, AnalysisResult, ChartImage
 
 __all__ = [
     "get_engine",
@@ -10,4 +10,5 @@ __all__ = [
     "Base",
     "Transaction",
     "AnalysisResult",
+    "ChartImage",
 ]
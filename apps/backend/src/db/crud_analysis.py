@@ -1,5 +1,6 @@
 """CRUD for AnalysisResult. Link to Transaction by transaction_id."""
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from db.models import AnalysisResult, Transaction
@@ -35,11 +36,12 @@ def get_latest_analysis_for_contract(
     user_id: str,
     contract_id: str,
 ) -> AnalysisResult | None:
-    """Get the most recent analysis for a user's contract."""
-    tx = session.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.contract_id == contract_id,
-    ).first()
-    if not tx or not tx.analysis_results:
-        return None
-    return max(tx.analysis_results, key=lambda r: r.created_at)
+    """Get the most recent analysis for a user's contract (single query, newest first)."""
+    stmt = (
+        select(AnalysisResult)
+        .join(Transaction, AnalysisResult.transaction_id == Transaction.id)
+        .where(Transaction.user_id == user_id, Transaction.contract_id == contract_id)
+        .order_by(AnalysisResult.created_at.desc())
+        .limit(1)
+    )
+    return session.execute(stmt).scalar_one_or_none()
@@ -1,10 +1,72 @@
 """CRUD for Transaction. Upsert by (user_id, contract_id)."""
 
+import base64
+import hashlib
+from dataclasses import dataclass, fields
+from datetime import datetime
 from typing import Any
 
+from sqlalchemy import func, lambda_stmt, null, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from db.models import Transaction
+from db.models import ChartImage, Transaction
+
+
+@dataclass(slots=True)
+class TransactionView:
+    """Read-only row for list endpoints: plain attributes, no ORM instance state or identity-map entry."""
+
+    id: int
+    user_id: str
+    contract_id: str
+    run_id: str | None
+    buy_price: float
+    payout: float
+    profit: float
+    currency: str
+    contract_type: str
+    shortcode: str
+    date_start: str
+    date_expiry: str
+    entry_tick: str | None
+    exit_tick: str | None
+    strategy_intent: dict | None
+    behavioral_summary: dict | None
+    chart_mime: str | None
+    created_at: datetime | None
+
+
+# Columns selected for TransactionView, in field order
+_VIEW_COLUMNS = tuple(getattr(Transaction, f.name) for f in fields(TransactionView))
+
+# Dialects with a native INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERT = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# On conflict these keep the stored value unless a new one is provided
+_KEEP_EXISTING_IF_NONE = ("strategy_intent", "behavioral_summary", "chart_sha256", "chart_mime")
+
+# Defaults for the upsert_transaction keyword arguments, used to fill bulk rows
+_ROW_DEFAULTS: dict[str, Any] = {
+    "run_id": None,
+    "buy_price": 0,
+    "payout": 0,
+    "profit": 0,
+    "currency": "",
+    "contract_type": "",
+    "shortcode": "",
+    "date_start": "",
+    "date_expiry": "",
+    "entry_tick": None,
+    "exit_tick": None,
+    "strategy_intent": None,
+    "behavioral_summary": None,
+    "chart_mime": None,
+}
+
+# Rows per multi-VALUES statement (~18 bind params each; stays under SQLite's variable limit)
+_BULK_CHUNK_ROWS = 500
 
 
 def upsert_transaction(
@@ -25,51 +87,161 @@ def upsert_transaction(
     exit_tick: str | None = None,
     strategy_intent: dict | None = None,
     behavioral_summary: dict | None = None,
-    chart_image_b64: str | None = None,
+    chart_image: bytes | None = None,
+    chart_mime: str | None = None,
 ) -> Transaction:
-    """Insert or update a transaction. Unique on (user_id, contract_id)."""
-    row = session.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.contract_id == contract_id,
-    ).first()
-    if row:
-        row.run_id = run_id or row.run_id
-        row.buy_price = buy_price
-        row.payout = payout
-        row.profit = profit
-        row.currency = currency
-        row.contract_type = contract_type
-        row.shortcode = shortcode
-        row.date_start = date_start
-        row.date_expiry = date_expiry
-        row.entry_tick = entry_tick
-        row.exit_tick = exit_tick
-        if strategy_intent is not None:
-            row.strategy_intent = strategy_intent
-        if behavioral_summary is not None:
-            row.behavioral_summary = behavioral_summary
-        if chart_image_b64 is not None:
-            row.chart_image_b64 = chart_image_b64
-        return row
-    row = Transaction(
-        user_id=user_id,
-        contract_id=contract_id,
-        run_id=run_id,
-        buy_price=buy_price,
-        payout=payout,
-        profit=profit,
-        currency=currency,
-        contract_type=contract_type,
-        shortcode=shortcode,
-        date_start=date_start,
-        date_expiry=date_expiry,
-        entry_tick=entry_tick,
-        exit_tick=exit_tick,
-        strategy_intent=strategy_intent,
-        behavioral_summary=behavioral_summary,
-        chart_image_b64=chart_image_b64,
+    """Insert or update a transaction. Unique on (user_id, contract_id).
+
+    Uses a single INSERT ... ON CONFLICT DO UPDATE on PostgreSQL/SQLite (one round-trip, no
+    read-then-write race); other dialects fall back to select-then-update. chart_image bytes are
+    stored in chart_images and referenced by sha256.
+    """
+    chart_sha256 = _store_chart_image(session, chart_image) if chart_image is not None else None
+    values = {
+        "user_id": user_id,
+        "contract_id": contract_id,
+        "run_id": run_id,
+        "buy_price": buy_price,
+        "payout": payout,
+        "profit": profit,
+        "currency": currency,
+        "contract_type": contract_type,
+        "shortcode": shortcode,
+        "date_start": date_start,
+        "date_expiry": date_expiry,
+        "entry_tick": entry_tick,
+        "exit_tick": exit_tick,
+        "strategy_intent": strategy_intent,
+        "behavioral_summary": behavioral_summary,
+        "chart_sha256": chart_sha256,
+        "chart_mime": chart_mime,
+    }
+    insert = _UPSERT_INSERT.get(session.get_bind().dialect.name)
+    if insert is None:
+        return _select_then_upsert(session, values)
+
+    stmt = insert(Transaction).values(**values)
+    set_ = {k: stmt.excluded[k] for k in _columns_to_update(values)}
+    set_["updated_at"] = datetime.utcnow()
+    stmt = stmt.on_conflict_do_update(index_elements=["user_id", "contract_id"], set_=set_)
+    return session.scalars(
+        stmt.returning(Transaction),
+        execution_options={"populate_existing": True},
+    ).one()
+
+
+def bulk_upsert_transactions(session: Session, rows: list[dict[str, Any]]) -> list[int]:
+    """Upsert many transactions with one INSERT ... ON CONFLICT DO UPDATE per chunk. Returns ids in input order.
+
+    Each row takes upsert_transaction's keyword arguments (user_id and contract_id required).
+    Per-row keep-existing rules are applied in SQL via COALESCE, so a single statement serves
+    rows with and without optional context. Repeated (user_id, contract_id) pairs are merged
+    first, since one ON CONFLICT statement may not touch the same row twice.
+    """
+    insert = _UPSERT_INSERT.get(session.get_bind().dialect.name)
+    if insert is None:
+        ids = []
+        for row in rows:
+            tx = upsert_transaction(session, **row)
+            session.flush()
+            ids.append(tx.id)
+        return ids
+
+    images: dict[str, bytes] = {}
+    merged: dict[tuple[str, str], dict[str, Any]] = {}
+    for row in rows:
+        values = {**_ROW_DEFAULTS, **row}
+        image = values.pop("chart_image", None)
+        values["chart_sha256"] = None
+        if image is not None:
+            values["chart_sha256"] = hashlib.sha256(image).hexdigest()
+            images[values["chart_sha256"]] = image
+        key = (values["user_id"], values["contract_id"])
+        if key in merged:
+            merged[key].update({k: values[k] for k in _columns_to_update(values)})
+        else:
+            merged[key] = values
+
+    for batch in _chunks([{"sha256": k, "image": v} for k, v in images.items()]):
+        session.execute(insert(ChartImage).values(batch).on_conflict_do_nothing(index_elements=["sha256"]))
+
+    table = Transaction.__table__
+    ids_by_key: dict[tuple[str, str], int] = {}
+    for batch in _chunks(list(merged.values())):
+        # Python None would be stored as JSON 'null' (not SQL NULL) and defeat COALESCE
+        batch = [
+            {k: null() if v is None and k in _KEEP_EXISTING_IF_NONE else v for k, v in values.items()}
+            for values in batch
+        ]
+        stmt = insert(Transaction).values(batch)
+        set_ = {}
+        for key in batch[0]:
+            if key in ("user_id", "contract_id"):
+                continue
+            if key == "run_id":
+                set_[key] = func.coalesce(func.nullif(stmt.excluded.run_id, ""), table.c.run_id)
+            elif key in _KEEP_EXISTING_IF_NONE:
+                set_[key] = func.coalesce(stmt.excluded[key], table.c[key])
+            else:
+                set_[key] = stmt.excluded[key]
+        set_["updated_at"] = datetime.utcnow()
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id", "contract_id"], set_=set_)
+        for user_id, contract_id, tx_id in session.execute(
+            stmt.returning(Transaction.user_id, Transaction.contract_id, Transaction.id)
+        ):
+            ids_by_key[(user_id, contract_id)] = tx_id
+    return [ids_by_key[(row["user_id"], row["contract_id"])] for row in rows]
+
+
+def _chunks(items: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    return [items[i : i + _BULK_CHUNK_ROWS] for i in range(0, len(items), _BULK_CHUNK_ROWS)]
+
+
+def _store_chart_image(session: Session, image: bytes) -> str:
+    """Store chart bytes once per content hash and return the hash."""
+    sha256 = hashlib.sha256(image).hexdigest()
+    insert = _UPSERT_INSERT.get(session.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(ChartImage).values(sha256=sha256, image=image)
+        session.execute(stmt.on_conflict_do_nothing(index_elements=["sha256"]))
+    elif session.scalar(select(ChartImage.sha256).where(ChartImage.sha256 == sha256)) is None:
+        session.add(ChartImage(sha256=sha256, image=image))
+    return sha256
+
+
+def _by_contract_stmt(user_id: str, contract_id: str):
+    """Cached lookup by (user_id, contract_id); lambda_stmt skips rebuilding and re-keying the select per call."""
+    return lambda_stmt(
+        lambda: select(Transaction).where(
+            Transaction.user_id == user_id,
+            Transaction.contract_id == contract_id,
+        )
     )
-    session.add(row)
+
+
+def _columns_to_update(values: dict[str, Any]) -> list[str]:
+    """Columns overwritten on an existing row (run_id only when set, optional context only when provided)."""
+    cols = []
+    for key, value in values.items():
+        if key in ("user_id", "contract_id"):
+            continue
+        if key == "run_id" and not value:
+            continue
+        if key in _KEEP_EXISTING_IF_NONE and value is None:
+            continue
+        cols.append(key)
+    return cols
+
+
+def _select_then_upsert(session: Session, values: dict[str, Any]) -> Transaction:
+    """Portable upsert for dialects without ON CONFLICT support."""
+    row = session.scalars(_by_contract_stmt(values["user_id"], values["contract_id"])).first()
+    if row is None:
+        row = Transaction(**values)
+        session.add(row)
+        return row
+    for key in _columns_to_update(values):
+        setattr(row, key, values[key])
     return row
 
 
@@ -80,15 +252,34 @@ def get_transactions(
     run_id: str | None = None,
     limit: int = 500,
     since_id: int | None = None,
-) -> list[Transaction]:
-    """List transactions for a user, optionally by run_id, with limit and cursor."""
-    q = session.query(Transaction).filter(Transaction.user_id == user_id)
+    before_id: int | None = None,
+) -> list[TransactionView]:
+    """List transactions for a user, newest first, optionally by run_id.
+
+    since_id returns only rows newer than a previously seen id (polling); before_id is the
+    keyset cursor for paging backwards (pass the last id of the previous page).
+    """
+    stmt = select(*_VIEW_COLUMNS).where(Transaction.user_id == user_id)
     if run_id is not None:
-        q = q.filter(Transaction.run_id == run_id)
+        stmt = stmt.where(Transaction.run_id == run_id)
     if since_id is not None:
-        q = q.filter(Transaction.id > since_id)
-    q = q.order_by(Transaction.id.desc())
-    return q.limit(limit).all()
+        stmt = stmt.where(Transaction.id > since_id)
+    if before_id is not None:
+        stmt = stmt.where(Transaction.id < before_id)
+    stmt = stmt.order_by(Transaction.id.desc()).limit(limit)
+    return [TransactionView(*row) for row in session.execute(stmt)]
+
+
+def get_chart_images_b64(session: Session, transaction_ids: list[int]) -> dict[int, str]:
+    """Base64 chart screenshots for the given transaction ids (ids without a chart are omitted), in one query."""
+    if not transaction_ids:
+        return {}
+    stmt = (
+        select(Transaction.id, ChartImage.image)
+        .join(ChartImage, ChartImage.sha256 == Transaction.chart_sha256)
+        .where(Transaction.id.in_(transaction_ids))
+    )
+    return {tx_id: base64.b64encode(image).decode("ascii") for tx_id, image in session.execute(stmt)}
 
 
 def get_transaction_by_contract(
@@ -97,17 +288,32 @@ def get_transaction_by_contract(
     contract_id: str,
 ) -> Transaction | None:
     """Get a single transaction by user_id and contract_id."""
-    return session.query(Transaction).filter(
-        Transaction.user_id == user_id,
-        Transaction.contract_id == contract_id,
-    ).first()
+    return session.scalars(_by_contract_stmt(user_id, contract_id)).first()
 
 
-def get_chart_image_b64(
+def get_chart_image(
     session: Session,
     user_id: str,
     contract_id: str,
-) -> str | None:
-    """Get stored chart image (base64) for a transaction, for use by analyst."""
-    tx = get_transaction_by_contract(session, user_id=user_id, contract_id=contract_id)
-    return tx.chart_image_b64 if tx else None
+    *,
+    encode_b64: bool = False,
+) -> tuple[bytes | str, str] | None:
+    """Get stored chart image and MIME type for a transaction, for use by analyst.
+
+    Returns raw bytes (as stored); encode_b64=True base64-encodes them on the way out for
+    callers that need text.
+    """
+    row = session.execute(
+        lambda_stmt(
+            lambda: select(ChartImage.image, Transaction.chart_mime)
+            .join(ChartImage, ChartImage.sha256 == Transaction.chart_sha256)
+            .where(
+                Transaction.user_id == user_id,
+                Transaction.contract_id == contract_id,
+            )
+        )
+    ).first()
+    if row is None:
+        return None
+    image = base64.b64encode(row.image).decode("ascii") if encode_b64 else row.image
+    return image, row.chart_mime or "image/png"
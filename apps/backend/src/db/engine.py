@@ -2,15 +2,35 @@
 
 import logging
 import os
+import time
+from functools import lru_cache
 from pathlib import Path
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
 from db.models import Base
 
 log = logging.getLogger("agent_analysis.db")
 
+# Applied to every new SQLite connection: WAL lets readers run alongside the writer
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+# Server databases: pre-ping/recycle drop stale Cloud SQL connections. Keep pool_size + max_overflow
+# times the instance count under the server's max_connections.
+_POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
 
 def _mask_url(url: str) -> str:
     """Mask password in DATABASE_URL for safe logging."""
@@ -27,8 +47,12 @@ def _mask_url(url: str) -> str:
 
 
 def get_engine():
-    """Create engine from DATABASE_URL. Defaults to SQLite in backend data dir."""
-    url = os.getenv("DATABASE_URL")
+    """Return the shared engine for DATABASE_URL (built once per URL). Defaults to SQLite in backend data dir."""
+    return _engine_for_url(os.getenv("DATABASE_URL"))
+
+
+@lru_cache(maxsize=1)
+def _engine_for_url(url: str | None):
     if not url:
         data_dir = Path(__file__).resolve().parent.parent / "data"
         data_dir.mkdir(exist_ok=True)
@@ -36,14 +60,23 @@ def get_engine():
         log.debug("Using default SQLite: %s", url)
     else:
         log.debug("Using DATABASE_URL: %s", _mask_url(url))
+    if not url.startswith("sqlite"):
+        return create_engine(url, **_POOL_OPTIONS)
     # SQLite needs check_same_thread=False for FastAPI
-    connect_args = {}
-    if url.startswith("sqlite"):
-        connect_args["check_same_thread"] = False
-    engine = create_engine(url, connect_args=connect_args)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _set_sqlite_pragmas)
     return engine
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 def get_session_factory(engine=None):
     """Return a session factory bound to the engine."""
     if engine is None:
@@ -51,32 +84,88 @@ def get_session_factory(engine=None):
     return sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def _migrate_add_chart_image(engine):
-    """Add chart_image_b64 column to transactions if missing (e.g. existing SQLite DBs)."""
-    from sqlalchemy import inspect, text
+def _migrate_chart_images(engine):
+    """Add chart_sha256/chart_mime columns if missing and move inline chart images into chart_images.
+
+    Covers both legacy layouts: base64 text in chart_image_b64 and raw bytes in chart_image.
+    """
+    import base64
+    import hashlib
+
+    from sqlalchemy import String, inspect, select
+
+    from db.models import ChartImage
+    from services.chart_image import image_mime
 
     try:
         insp = inspect(engine)
         if "transactions" not in insp.get_table_names():
             return
         cols = [c["name"] for c in insp.get_columns("transactions")]
-        if "chart_image_b64" in cols:
-            return
         with engine.connect() as conn:
-            conn.execute(text("ALTER TABLE transactions ADD COLUMN chart_image_b64 TEXT"))
+            for name, length in (("chart_sha256", 64), ("chart_mime", 32)):
+                if name not in cols:
+                    col_type = String(length).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE transactions ADD COLUMN {name} {col_type}"))
+            for legacy_col, decode in (("chart_image_b64", base64.b64decode), ("chart_image", bytes)):
+                if legacy_col not in cols:
+                    continue
+                legacy = conn.execute(
+                    text(
+                        f"SELECT id, {legacy_col} FROM transactions "
+                        f"WHERE {legacy_col} IS NOT NULL AND chart_sha256 IS NULL"
+                    )
+                ).all()
+                for row_id, value in legacy:
+                    data = decode(value)
+                    sha256 = hashlib.sha256(data).hexdigest()
+                    if conn.scalar(select(ChartImage.sha256).where(ChartImage.sha256 == sha256)) is None:
+                        conn.execute(ChartImage.__table__.insert().values(sha256=sha256, image=data))
+                    conn.execute(
+                        text(
+                            "UPDATE transactions SET chart_sha256 = :sha256, "
+                            "chart_mime = COALESCE(chart_mime, :mime) WHERE id = :id"
+                        ),
+                        {"sha256": sha256, "mime": image_mime(data), "id": row_id},
+                    )
+                conn.execute(text(f"UPDATE transactions SET {legacy_col} = NULL WHERE {legacy_col} IS NOT NULL"))
+                if legacy:
+                    log.info("Moved %d chart image(s) from %s to chart_images", len(legacy), legacy_col)
             conn.commit()
-    except Exception:
-        pass  # Column may already exist or DB may not support ALTER
+    except Exception as e:
+        log.warning("Chart image migration skipped: %s", e)
+
+
+def _create_missing_indexes(engine):
+    """Create indexes added to the models after their tables already existed (create_all skips those)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                log.warning("Could not create index %s: %s", index.name, e)
 
 
-def check_connection(engine=None) -> bool:
-    """Verify DB is reachable. Returns True if ok, False otherwise. Logs errors."""
+# Last successful check per database URL (monotonic seconds), for max_age short-circuiting
+_last_ok_at: dict[str, float] = {}
+
+
+def check_connection(engine=None, max_age: float = 0) -> bool:
+    """Verify DB is reachable. Returns True if ok, False otherwise. Logs errors.
+
+    With max_age > 0, a check that succeeded within the last max_age seconds is reused
+    instead of running SELECT 1 again (keeps frequent health probes off the database).
+    """
     if engine is None:
         engine = get_engine()
+    key = str(engine.url)
+    if max_age > 0 and time.monotonic() - _last_ok_at.get(key, float("-inf")) < max_age:
+        return True
     try:
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         log.debug("Database connection check OK")
+        _last_ok_at[key] = time.monotonic()
         return True
     except Exception as e:
         log.error("Database connection failed: %s", e, exc_info=True)
@@ -92,5 +181,6 @@ def init_db(engine=None):
     if not check_connection(engine):
         raise RuntimeError("Database not available (connection check failed)")
     Base.metadata.create_all(bind=engine)
-    _migrate_add_chart_image(engine)
+    _migrate_chart_images(engine)
+    _create_missing_indexes(engine)
     log.info("Database tables ready")
@@ -1,8 +1,20 @@
-"""SQLAlchemy models for Transaction and AnalysisResult. Align with TradePayload/Contract and agent outputs."""
+"""SQLAlchemy models for Transaction, AnalysisResult and ChartImage. Align with TradePayload/Contract and agent outputs."""
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, JSON, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -35,8 +47,10 @@ class Transaction(Base):
     strategy_intent = Column(JSON, nullable=True)
     behavioral_summary = Column(JSON, nullable=True)
 
-    # Chart screenshot (base64 PNG) for analyst agent
-    chart_image_b64 = Column(Text, nullable=True)
+    # Chart screenshot for analyst agent: bytes live in chart_images (keyed by sha256) so this
+    # table's rows stay narrow; chart_mime is the MIME type detected at upload and doubles as "has chart".
+    chart_sha256 = Column(String(64), nullable=True)
+    chart_mime = Column(String(32), nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -65,3 +79,22 @@ class AnalysisResult(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     transaction = relationship("Transaction", back_populates="analysis_results")
+
+
+class ChartImage(Base):
+    """Chart screenshot bytes, content-addressed so identical uploads are stored once."""
+
+    __tablename__ = "chart_images"
+
+    sha256 = Column(String(64), primary_key=True)
+    image = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Keyset pagination for get_transactions: (user_id[, run_id]) equality + id DESC walk, no sort
+Index("ix_tx_user_id_desc", Transaction.user_id, Transaction.id.desc())
+Index("ix_tx_user_run_id_desc", Transaction.user_id, Transaction.run_id, Transaction.id.desc())
+
+# Latest-analysis-per-transaction lookups walk this index instead of sorting
+Index("ix_ar_tx_created", AnalysisResult.transaction_id, AnalysisResult.created_at.desc())
@@ -0,0 +1,23 @@
+"""Shared session factory and FastAPI DB dependency: one engine and connection pool for all routers."""
+
+from functools import lru_cache
+from typing import Iterator
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.engine import get_engine, get_session_factory
+
+
+@lru_cache(maxsize=1)
+def session_local() -> sessionmaker:
+    """Session factory bound to the shared engine, built on first use (after .env has been loaded)."""
+    return get_session_factory(get_engine())
+
+
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency yielding a session from the shared pool."""
+    session = session_local()()
+    try:
+        yield session
+    finally:
+        session.close()
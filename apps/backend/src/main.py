@@ -90,7 +90,7 @@ app.include_router(transactions_router)
 @app.get("/health")
 def health():
     """Liveness: always 200. Includes db status for debugging."""
-    db_ok = check_connection(get_engine())
+    db_ok = check_connection(get_engine(), max_age=5.0)
     status = "ok" if db_ok else "degraded"
     return {
         "status": status,
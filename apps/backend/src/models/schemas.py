@@ -1,5 +1,6 @@
 """Pydantic models matching the trade JSON schema for Analyst/Tutor pipeline."""
 
+from functools import cached_property
 from typing import Optional
 from pydantic import BaseModel, Field
 
@@ -64,6 +65,11 @@ class TradePayload(BaseModel):
     strategy_intent: Optional[StrategyIntent] = None
     behavioral_summary: Optional[BehavioralSummary] = None
 
+    @cached_property
+    def json_blob(self) -> str:
+        """Compact JSON of the payload, serialized once and shared by prompt building and cache keys."""
+        return self.model_dump_json()
+
 
 class AnalystOutput(BaseModel):
     """Structured output from Analyst Agent."""
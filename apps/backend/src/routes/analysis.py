@@ -1,43 +1,41 @@
 """FastAPI routes for trade analysis pipeline."""
 
+import asyncio
 import json
 import logging
 import os
-import base64
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
 
-from db import get_engine, get_session_factory
 from db.crud_analysis import create_analysis_result
-from db.crud_transactions import get_chart_image_b64, upsert_transaction
-from models.schemas import TradePayload, AnalystOutput, TutorOutput
-from agents import run_analyst, run_tutor
+from db.crud_transactions import get_chart_image, upsert_transaction
+from db.pool import get_db
+from models.schemas import AnalystOutput, TradePayload, TutorOutput
+from agents import run_analyst, run_analyst_batch, run_tutor
+from agents.response_cache import cache_key
+from services.chart_image import image_mime
 from services.rag import learn_from_trade, _extract_learning_points
 
 log = logging.getLogger("agent_analysis.routes.analysis")
 
 router = APIRouter(prefix="/api/agent_analysis", tags=["agent_analysis"])
 
-_SessionLocal = None
-
-
-def _get_db():
-    global _SessionLocal
-    if _SessionLocal is None:
-        _SessionLocal = get_session_factory(get_engine())
-    session = _SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-
 EXPLANATIONS_DIR = Path(__file__).resolve().parent.parent / "Explanations"
 EXPLANATIONS_DIR.mkdir(exist_ok=True)
 
+# Gemini caps inline request data at 20 MB; larger screenshots are rejected before being read into memory
+_MAX_CHART_BYTES = 20 * 1024 * 1024
+
+# Pipelines currently running, by content hash: identical requests (client retries, replays) that
+# arrive before the first finishes share its result; finished ones are served by the agents' caches.
+_agents_in_flight: dict[str, asyncio.Task] = {}
+
 
 class SourceCitation(BaseModel):
     url: str
@@ -54,15 +52,61 @@ class AnalysisResponse(BaseModel):
     sources: list[SourceCitation] = Field(default_factory=list)
 
 
-def _save_explanation(contract_id: str, tutor_output: TutorOutput) -> str:
-    """Save explanation to Explanations folder. Returns relative path."""
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"{contract_id}_{ts}.txt"
+_analysis_response_list = TypeAdapter(list[AnalysisResponse])
+# Batch bodies are validated straight from the request bytes (one pydantic-core pass, no dict stage)
+_trade_payload_list = TypeAdapter(list[TradePayload])
+
+
+def _analysis_json(response: AnalysisResponse) -> Response:
+    """Serialize straight to JSON bytes. Returning a Response skips FastAPI's response_model
+    re-validation and jsonable_encoder pass; response_model stays on the routes for the OpenAPI schema."""
+    return Response(content=response.model_dump_json(), media_type="application/json")
+
+
+def _explanation_filename(contract_id: str) -> str:
+    # Nanosecond stamp keeps concurrent saves for the same contract from overwriting each other
+    return f"{contract_id}_{time.time_ns()}.txt"
+
+
+async def _save_explanation(filename: str, tutor_output: TutorOutput) -> None:
+    """Save explanation to Explanations folder under the given filename."""
     path = EXPLANATIONS_DIR / filename
-    content = f"# Trade Explanation\n\n{tutor_output.explanation}\n\n## Learning Points\n"
-    for i, pt in enumerate(tutor_output.learning_points, 1):
-        content += f"{i}. {pt}\n"
-    path.write_text(content, encoding="utf-8")
+    generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    content = "".join(
+        [
+            f"# Trade Explanation\n\nGenerated: {generated_at}\n\n{tutor_output.explanation}\n\n## Learning Points\n",
+            *(f"{i}. {pt}\n" for i, pt in enumerate(tutor_output.learning_points, 1)),
+        ]
+    )
+    # Disk write in a worker thread so slow storage never stalls the event loop
+    await asyncio.to_thread(path.write_text, content, encoding="utf-8")
+
+
+async def _save_and_persist(
+    db: Session,
+    payload: TradePayload,
+    analyst_output: AnalystOutput,
+    tutor_output: TutorOutput,
+    loginid: str | None,
+    chart_image: bytes | None = None,
+    chart_mime: str | None = None,
+) -> str:
+    """Write the explanation file and persist to DB concurrently. Returns the explanation filename."""
+    filename = _explanation_filename(payload.contract.contract_id)
+    await asyncio.gather(
+        _save_explanation(filename, tutor_output),
+        asyncio.to_thread(
+            _persist_payload_and_result,
+            db,
+            payload,
+            analyst_output,
+            tutor_output,
+            filename,
+            loginid,
+            chart_image=chart_image,
+            chart_mime=chart_mime,
+        ),
+    )
     return filename
 
 
@@ -73,7 +117,8 @@ def _persist_payload_and_result(
     tutor_output: TutorOutput,
     explanation_file: str,
     loginid: str | None,
-    chart_image_b64: str | None = None,
+    chart_image: bytes | None = None,
+    chart_mime: str | None = None,
 ):
     """Upsert transaction and create analysis result when loginid is provided."""
     if not loginid:
@@ -96,7 +141,8 @@ def _persist_payload_and_result(
         exit_tick=c.exit_tick,
         strategy_intent=payload.strategy_intent.model_dump() if payload.strategy_intent else None,
         behavioral_summary=payload.behavioral_summary.model_dump() if payload.behavioral_summary else None,
-        chart_image_b64=chart_image_b64,
+        chart_image=chart_image,
+        chart_mime=chart_mime,
     )
     db.flush()  # ensure tx.id is set for new rows
     create_analysis_result(
@@ -112,6 +158,61 @@ def _persist_payload_and_result(
     db.commit()
 
 
+async def _run_agents(
+    payload: TradePayload,
+    api_key: str,
+    chart_image: bytes | None = None,
+    chart_mime: str = "image/png",
+) -> tuple[AnalystOutput, TutorOutput]:
+    """Run the Analyst+Tutor pipeline once per distinct (payload, chart) among concurrent requests."""
+    key = cache_key(payload.json_blob.encode(), chart_image or b"")
+    task = _agents_in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_agents_once(payload, api_key, chart_image, chart_mime))
+        _agents_in_flight[key] = task
+        task.add_done_callback(lambda _: _agents_in_flight.pop(key, None))
+    # Shielded so one caller disconnecting does not cancel the run for the others
+    return await asyncio.shield(task)
+
+
+async def _run_agents_once(
+    payload: TradePayload,
+    api_key: str,
+    chart_image: bytes | None = None,
+    chart_mime: str = "image/png",
+) -> tuple[AnalystOutput, TutorOutput]:
+    """Run Analyst, starting Tutor as soon as trade_analysis has streamed in.
+
+    Tutor then overlaps with the rest of the Analyst generation instead of waiting for it.
+    Runs Tutor on the full output when it is already available (Analyst cache hit) or if
+    the field never completes mid-stream.
+    """
+    trade_analysis_ready: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+    analyst_task = asyncio.create_task(
+        run_analyst(
+            payload,
+            chart_image=chart_image,
+            chart_mime=chart_mime,
+            api_key=api_key,
+            trade_analysis_ready=trade_analysis_ready,
+        )
+    )
+    await asyncio.wait({analyst_task, trade_analysis_ready}, return_when=asyncio.FIRST_COMPLETED)
+    # Full output already there (cache hit, or the stream finished first): no draft needed
+    if analyst_task.done() or not trade_analysis_ready.done():
+        analyst_output = await analyst_task
+        return analyst_output, await run_tutor(analyst_output, payload, api_key=api_key)
+
+    draft = AnalystOutput(trade_analysis=trade_analysis_ready.result(), win_loss_assessment="")
+    tutor_task = asyncio.create_task(run_tutor(draft, payload, api_key=api_key))
+    try:
+        analyst_output = await analyst_task
+    except BaseException:
+        tutor_task.cancel()
+        raise
+    return analyst_output, await tutor_task
+
+
 _DERIV_BLOG_BASE = "https://deriv.com/blog/posts"
 
 
@@ -176,7 +277,7 @@ async def analyse_trade(
     payload_json: str = Form(..., description="Trade payload as JSON string"),
     chart_screenshot: UploadFile | None = File(None),
     loginid: str | None = Query(None, description="User login id for persisting to DB"),
-    db: Session = Depends(_get_db),
+    db: Session = Depends(get_db),
 ):
     """
     Analyse a trade: JSON + optional chart screenshot → Analyst Agent → Tutor Agent → Explanations.
@@ -186,13 +287,31 @@ async def analyse_trade(
         payload = TradePayload.model_validate_json(payload_json)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid payload JSON: {e}")
+    return _analysis_json(await _analyse_with_chart(payload, chart_screenshot, loginid, db))
+
+
+async def _read_chart_upload(upload: UploadFile) -> bytes:
+    """Read the spooled upload as raw bytes (one buffer, no base64), rejecting oversized files up front."""
+    if upload.size is not None and upload.size > _MAX_CHART_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chart screenshot exceeds {_MAX_CHART_BYTES // (1024 * 1024)} MB")
+    return await upload.read()
+
 
-    chart_b64: str | None = None
+async def _analyse_with_chart(
+    payload: TradePayload,
+    chart_screenshot: UploadFile | None,
+    loginid: str | None,
+    db: Session,
+) -> AnalysisResponse:
+    chart_image: bytes | None = None
+    chart_mime: str | None = None
     if chart_screenshot and chart_screenshot.filename:
-        content = await chart_screenshot.read()
-        chart_b64 = base64.b64encode(content).decode("utf-8")
-    if chart_b64 is None and loginid:
-        chart_b64 = get_chart_image_b64(db, user_id=loginid, contract_id=payload.contract.contract_id)
+        chart_image = await _read_chart_upload(chart_screenshot)
+        chart_mime = image_mime(chart_image)
+    if chart_image is None and loginid:
+        stored = get_chart_image(db, user_id=loginid, contract_id=payload.contract.contract_id)
+        if stored:
+            chart_image, chart_mime = stored
 
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
@@ -202,18 +321,24 @@ async def analyse_trade(
             detail="GEMINI_API_KEY not set. Add it to apps/backend/.env (or repo root .env).",
         )
 
-    log.debug("Running analyst then tutor for contract_id=%s", payload.contract.contract_id)
+    log.debug("Running analyst and tutor for contract_id=%s", payload.contract.contract_id)
     try:
-        analyst_output: AnalystOutput = run_analyst(payload, chart_image_b64=chart_b64, api_key=api_key)
-        tutor_output: TutorOutput = run_tutor(analyst_output, payload, api_key=api_key)
+        analyst_output, tutor_output = await _run_agents(
+            payload, api_key, chart_image=chart_image, chart_mime=chart_mime or "image/png"
+        )
     except Exception as e:
         log.exception("Agent error: %s", e)
         raise HTTPException(status_code=500, detail=f"Agent error: {e!s}") from e
 
-    explanation_file = _save_explanation(payload.contract.contract_id, tutor_output)
     try:
-        _persist_payload_and_result(
-            db, payload, analyst_output, tutor_output, explanation_file, loginid, chart_image_b64=chart_b64
+        explanation_file = await _save_and_persist(
+            db,
+            payload,
+            analyst_output,
+            tutor_output,
+            loginid,
+            chart_image=chart_image,
+            chart_mime=chart_mime,
         )
     except Exception as e:
         log.exception("Failed to persist analysis result: %s", e)
@@ -231,32 +356,104 @@ async def analyse_trade(
 async def analyse_trade_json_only(
     payload: TradePayload,
     loginid: str | None = Query(None, description="User login id for persisting to DB"),
-    db: Session = Depends(_get_db),
+    db: Session = Depends(get_db),
 ):
     """Analyse trade from JSON only (no chart). When loginid is provided, persists to DB."""
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not set in .env")
 
-    analyst_output = run_analyst(payload, chart_image_b64=None, api_key=api_key)
-    tutor_output = run_tutor(analyst_output, payload, api_key=api_key)
+    analyst_output, tutor_output = await _run_agents(payload, api_key)
 
-    explanation_file = _save_explanation(payload.contract.contract_id, tutor_output)
-    _persist_payload_and_result(db, payload, analyst_output, tutor_output, explanation_file, loginid)
+    explanation_file = await _save_and_persist(db, payload, analyst_output, tutor_output, loginid)
 
-    return AnalysisResponse(
-        trade_explanation=tutor_output.explanation,
-        learning_recommendation=analyst_output.win_loss_assessment,
-        learning_points=tutor_output.learning_points,
-        explanation_file=explanation_file,
+    return _analysis_json(
+        AnalysisResponse(
+            trade_explanation=tutor_output.explanation,
+            learning_recommendation=analyst_output.win_loss_assessment,
+            learning_points=tutor_output.learning_points,
+            explanation_file=explanation_file,
+        )
+    )
+
+
+@router.post(
+    "/analyse/batch",
+    response_model=list[AnalysisResponse],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    # TradePayload is already a component via /analyse/json
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TradePayload"}}
+                }
+            },
+        }
+    },
+)
+async def analyse_trades_batch(
+    request: Request,
+    loginid: str | None = Query(None, description="User login id for persisting to DB"),
+    db: Session = Depends(get_db),
+):
+    """Analyse several trades (JSON only, no chart); Analyst runs batched, Tutor per trade. When loginid is provided, persists each to DB."""
+    try:
+        payloads = _trade_payload_list.validate_json(await request.body())
+    except ValidationError as e:
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors) from e
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not set in .env")
+
+    log.debug("Running batched analyst for %d trade(s)", len(payloads))
+    try:
+        analyst_outputs = await run_analyst_batch(payloads, api_key=api_key)
+    except Exception as e:
+        log.error("Analyst batch error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Agent error: {e!s}") from e
+
+    # Fan-out is paced by the shared Gemini rate limiter (agents.ratelimit.gemini_limiter)
+    results = await asyncio.gather(
+        *(run_tutor(a, p, api_key=api_key) for a, p in zip(analyst_outputs, payloads)),
+        return_exceptions=True,
     )
 
+    for payload, tutor_output in zip(payloads, results):
+        if isinstance(tutor_output, BaseException):
+            log.error("Agent error for contract_id=%s: %s", payload.contract.contract_id, tutor_output)
+            raise HTTPException(status_code=500, detail=f"Agent error: {tutor_output!s}") from tutor_output
+
+    filenames = [_explanation_filename(p.contract.contract_id) for p in payloads]
+
+    def _persist_all() -> None:
+        # One session, so rows are written sequentially in a single worker thread
+        for payload, analyst_output, tutor_output, filename in zip(payloads, analyst_outputs, results, filenames):
+            _persist_payload_and_result(db, payload, analyst_output, tutor_output, filename, loginid)
+
+    await asyncio.gather(
+        *(_save_explanation(f, t) for f, t in zip(filenames, results)),
+        asyncio.to_thread(_persist_all),
+    )
+    responses = [
+        AnalysisResponse(
+            trade_explanation=tutor_output.explanation,
+            learning_recommendation=analyst_output.win_loss_assessment,
+            learning_points=tutor_output.learning_points,
+            explanation_file=filename,
+        )
+        for analyst_output, tutor_output, filename in zip(analyst_outputs, results, filenames)
+    ]
+    return Response(content=_analysis_response_list.dump_json(responses), media_type="application/json")
+
 
 @router.post("/learn-from-trade", response_model=AnalysisResponse)
 async def learn_from_trade_endpoint(
     payload_json: str = Form(..., description="Trade payload as JSON string"),
     loginid: str | None = Query(None, description="User login id for persisting to DB"),
-    db: Session = Depends(_get_db),
+    db: Session = Depends(get_db),
 ):
     """RAG-grounded learning from trade. Uses knowledge base + trade context."""
     try:
@@ -275,7 +472,7 @@ async def learn_from_trade_endpoint(
     )
 
     try:
-        rag_result = learn_from_trade(trade_analysis=trade_analysis)
+        rag_result = await asyncio.to_thread(learn_from_trade, trade_analysis=trade_analysis)
     except FileNotFoundError as e:
         log.warning("RAG index missing: %s", e)
         raise HTTPException(
@@ -304,20 +501,21 @@ async def learn_from_trade_endpoint(
         key_factors=[],
         win_loss_assessment=f"RAG-grounded ({rag_result.get('confidence', 'unknown')} confidence)",
     )
-    explanation_file = _save_explanation(payload.contract.contract_id, tutor_output)
     try:
-        _persist_payload_and_result(db, payload, analyst_output, tutor_output, explanation_file, loginid)
+        explanation_file = await _save_and_persist(db, payload, analyst_output, tutor_output, loginid)
     except Exception as e:
         log.exception("Failed to persist: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to persist: {e!s}") from e
 
     sources = [_filename_to_citation(s) for s in rag_result.get("sources", [])]
-    return AnalysisResponse(
-        trade_explanation=answer,
-        learning_recommendation=analyst_output.win_loss_assessment,
-        learning_points=learning_points,
-        explanation_file=explanation_file,
-        sources=sources,
+    return _analysis_json(
+        AnalysisResponse(
+            trade_explanation=answer,
+            learning_recommendation=analyst_output.win_loss_assessment,
+            learning_points=learning_points,
+            explanation_file=explanation_file,
+            sources=sources,
+        )
     )
 
 
@@ -325,7 +523,7 @@ async def learn_from_trade_endpoint(
 async def learn_from_trade_json(
     payload: TradePayload,
     loginid: str | None = Query(None, description="User login id for persisting to DB"),
-    db: Session = Depends(_get_db),
+    db: Session = Depends(get_db),
 ):
     """RAG-grounded learning from trade (JSON body)."""
     trade_analysis = _build_trade_analysis_from_payload(payload)
@@ -339,7 +537,7 @@ async def learn_from_trade_json(
     )
 
     try:
-        rag_result = learn_from_trade(trade_analysis=trade_analysis)
+        rag_result = await asyncio.to_thread(learn_from_trade, trade_analysis=trade_analysis)
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=503,
@@ -367,14 +565,15 @@ async def learn_from_trade_json(
         key_factors=[],
         win_loss_assessment=f"RAG-grounded ({rag_result.get('confidence', 'unknown')} confidence)",
     )
-    explanation_file = _save_explanation(payload.contract.contract_id, tutor_output)
-    _persist_payload_and_result(db, payload, analyst_output, tutor_output, explanation_file, loginid)
+    explanation_file = await _save_and_persist(db, payload, analyst_output, tutor_output, loginid)
 
     sources = [_filename_to_citation(s) for s in rag_result.get("sources", [])]
-    return AnalysisResponse(
-        trade_explanation=answer,
-        learning_recommendation=analyst_output.win_loss_assessment,
-        learning_points=learning_points,
-        explanation_file=explanation_file,
-        sources=sources,
+    return _analysis_json(
+        AnalysisResponse(
+            trade_explanation=answer,
+            learning_recommendation=analyst_output.win_loss_assessment,
+            learning_points=learning_points,
+            explanation_file=explanation_file,
+            sources=sources,
+        )
     )
@@ -1,39 +1,30 @@
 """FastAPI routes for syncing and querying transactions."""
 
+import asyncio
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
 
-from db import get_engine, get_session_factory
-from db.crud_transactions import get_chart_image_b64, get_transactions, upsert_transaction
+from db.crud_transactions import (
+    bulk_upsert_transactions,
+    get_chart_image,
+    get_chart_images_b64,
+    get_transactions,
+)
+from db.pool import get_db
+from services.chart_image import decode_chart_image_b64
 
 log = logging.getLogger("agent_analysis.routes.transactions")
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 
-_engine = None
-_SessionLocal = None
-
-
-def _get_session():
-    global _engine, _SessionLocal
-    if _engine is None:
-        _engine = get_engine()
-        _SessionLocal = get_session_factory(_engine)
-    return _SessionLocal()
-
-
-def get_db():
-    session = _get_session()
-    try:
-        yield session
-    finally:
-        session.close()
-
-
 class TransactionIn(BaseModel):
     """Single transaction payload (Contract shape + optional loginid and context)."""
+    model_config = ConfigDict(extra="ignore")
+
     loginid: str | None = None
     user_id: str | None = None  # alias for loginid
     contract_id: str
@@ -52,54 +43,94 @@ class TransactionIn(BaseModel):
     behavioral_summary: dict | None = None
     chart_image_b64: str | None = None
 
-    class Config:
-        extra = "ignore"
-
 
 class TransactionSyncResponse(BaseModel):
     count: int
     ids: list[int]
 
 
-@router.post("", response_model=TransactionSyncResponse, status_code=201)
-def sync_transactions(
-    body: TransactionIn | list[TransactionIn],
-    db: Session = Depends(get_db),
-):
+# Built once: validates the raw body in one pass instead of FastAPI's per-request union dispatch
+_SYNC_BODY = TypeAdapter(TransactionIn | list[TransactionIn])
+_TRANSACTION_IN_SCHEMA = TransactionIn.model_json_schema()
+
+
+@router.post(
+    "",
+    response_model=TransactionSyncResponse,
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "anyOf": [
+                            _TRANSACTION_IN_SCHEMA,
+                            {"type": "array", "items": _TRANSACTION_IN_SCHEMA},
+                        ]
+                    }
+                }
+            },
+        }
+    },
+)
+async def sync_transactions(request: Request, db: Session = Depends(get_db)):
     """
     Upsert one or more transactions. Uses loginid or user_id; unique per (user_id, contract_id).
+    All items are written with a single bulk upsert.
     """
+    try:
+        body = _SYNC_BODY.validate_json(await request.body())
+    except ValidationError as e:
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors) from e
     items = body if isinstance(body, list) else [body]
     log.debug("sync_transactions: %d item(s)", len(items))
-    ids = []
+    return await asyncio.to_thread(_sync_items, db, items)
+
+
+def _sync_items(db: Session, items: list[TransactionIn]) -> Response:
+    rows = []
     try:
         for t in items:
             user_id = t.loginid or t.user_id
             if not user_id:
                 raise HTTPException(status_code=400, detail="loginid or user_id required")
-            row = upsert_transaction(
-                db,
-                user_id=user_id,
-                contract_id=t.contract_id,
-                run_id=t.run_id,
-                buy_price=t.buy_price,
-                payout=t.payout,
-                profit=t.profit,
-                currency=t.currency,
-                contract_type=t.contract_type,
-                shortcode=t.shortcode,
-                date_start=t.date_start,
-                date_expiry=t.date_expiry,
-                entry_tick=t.entry_tick,
-                exit_tick=t.exit_tick,
-                strategy_intent=t.strategy_intent,
-                behavioral_summary=t.behavioral_summary,
-                chart_image_b64=getattr(t, "chart_image_b64", None),
+            chart_image, chart_mime = None, None
+            if t.chart_image_b64:
+                try:
+                    chart_image, chart_mime = decode_chart_image_b64(t.chart_image_b64)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e)) from e
+            rows.append(
+                dict(
+                    user_id=user_id,
+                    contract_id=t.contract_id,
+                    run_id=t.run_id,
+                    buy_price=t.buy_price,
+                    payout=t.payout,
+                    profit=t.profit,
+                    currency=t.currency,
+                    contract_type=t.contract_type,
+                    shortcode=t.shortcode,
+                    date_start=t.date_start,
+                    date_expiry=t.date_expiry,
+                    entry_tick=t.entry_tick,
+                    exit_tick=t.exit_tick,
+                    strategy_intent=t.strategy_intent,
+                    behavioral_summary=t.behavioral_summary,
+                    chart_image=chart_image,
+                    chart_mime=chart_mime,
+                )
             )
-            db.flush()  # ensure row.id is set for new inserts
-            ids.append(row.id)
+        ids = bulk_upsert_transactions(db, rows)
         db.commit()
-        return TransactionSyncResponse(count=len(ids), ids=ids)
+        # Pre-built body: skips response_model re-validation (the model still documents the schema)
+        return Response(
+            content=orjson.dumps({"count": len(ids), "ids": ids}),
+            status_code=201,
+            media_type="application/json",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -113,15 +144,23 @@ def list_transactions(
     run_id: str | None = Query(None),
     limit: int = Query(500, ge=1, le=5000),
     since: int | None = Query(None, description="Return transactions with id > since"),
+    before: int | None = Query(None, description="Page cursor: return transactions with id < before"),
+    include_chart: bool = Query(
+        False, description="Also return chart_image_b64 per row (otherwise fetch GET /{contract_id}/chart)"
+    ),
     db: Session = Depends(get_db),
 ):
-    """List transactions for a user. For use by agents or UI."""
+    """List transactions for a user, newest first. For use by agents or UI."""
     try:
-        rows = get_transactions(db, user_id=loginid, run_id=run_id, limit=limit, since_id=since)
+        rows = get_transactions(
+            db, user_id=loginid, run_id=run_id, limit=limit, since_id=since, before_id=before
+        )
+        charts = get_chart_images_b64(db, [r.id for r in rows if r.chart_mime is not None]) if include_chart else None
     except Exception as e:
         log.exception("list_transactions failed (loginid=%s): %s", loginid, e)
         raise HTTPException(status_code=500, detail=f"Database error: {e!s}") from e
-    return [
+    # Plain dicts straight to JSON bytes: no response_model, so no jsonable_encoder walk over up to 5000 rows
+    rows_out = [
         {
             "id": r.id,
             "user_id": r.user_id,
@@ -139,8 +178,30 @@ def list_transactions(
             "exit_tick": r.exit_tick,
             "strategy_intent": r.strategy_intent,
             "behavioral_summary": r.behavioral_summary,
-            "chart_image_b64": r.chart_image_b64,
-            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "has_chart_image": r.chart_mime is not None,
+            "created_at": r.created_at,  # orjson writes naive datetimes in isoformat() form
         }
         for r in rows
     ]
+    if charts is not None:
+        for row in rows_out:
+            row["chart_image_b64"] = charts.get(row["id"])
+    return Response(content=orjson.dumps(rows_out), media_type="application/json")
+
+
+@router.get("/{contract_id}/chart")
+def get_transaction_chart(
+    contract_id: str,
+    loginid: str = Query(..., description="User login id"),
+    db: Session = Depends(get_db),
+):
+    """Return the stored chart screenshot for a transaction as an image."""
+    try:
+        chart = get_chart_image(db, user_id=loginid, contract_id=contract_id)
+    except Exception as e:
+        log.exception("get_transaction_chart failed (loginid=%s): %s", loginid, e)
+        raise HTTPException(status_code=500, detail=f"Database error: {e!s}") from e
+    if chart is None:
+        raise HTTPException(status_code=404, detail="No chart image for this transaction")
+    image, mime = chart
+    return Response(content=image, media_type=mime)
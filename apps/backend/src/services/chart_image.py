@@ -0,0 +1,30 @@
+"""Chart screenshot helpers: decode uploads once and detect their MIME type at ingest."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+
+
+# Leading signature -> MIME: PNG (8 bytes) and the JPEG SOI marker (3 bytes, shared by JFIF/Exif variants)
+_MAGIC = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+}
+
+
+def image_mime(img_bytes: bytes) -> str:
+    """Detect MIME type from image bytes (PNG/JPEG). Defaults to PNG."""
+    return _MAGIC.get(img_bytes[:8]) or _MAGIC.get(img_bytes[:3], "image/png")
+
+
+def decode_chart_image_b64(chart_image_b64: str) -> tuple[bytes, str]:
+    """Decode a base64 chart screenshot into raw bytes and its MIME type.
+
+    Raises ValueError if the string is not valid base64.
+    """
+    try:
+        data = base64.b64decode(chart_image_b64, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid chart_image_b64: {e}") from e
+    return data, image_mime(data)
@@ -9,6 +9,9 @@ log = logging.getLogger("agent_analysis.services.rag")
 
 _LEARN_QUESTION = "What are the key learning points for this trade?"
 
+# Numbered items or bullets at the start of a line
+_POINT_SPLIT_RE = re.compile(r"\n *[-•*]\s+|\n\d+\.\s+")
+
 
 def learn_from_trade(
     trade_analysis: str,
@@ -41,7 +44,7 @@ def _extract_learning_points(answer: str) -> list[str]:
     if not answer or answer == "INSUFFICIENT_CONTEXT":
         return []
     # Split on numbered items, bullets, or newlines
-    parts = re.split(r"\n *[-•*]\s+|\n\d+\.\s+", answer.strip())
+    parts = _POINT_SPLIT_RE.split(answer.strip())
     parts = [p.strip() for p in parts if p.strip()]
     if len(parts) <= 1:
         return [answer.strip()] if answer.strip() else []
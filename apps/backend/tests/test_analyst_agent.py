@@ -0,0 +1,38 @@
+import orjson
+import pytest
+
+from agents.analyst_agent import _completed_string_field, _StringFieldScanner
+
+DOC = orjson.dumps(
+    {"trade_analysis": 'He said "buy" \\ then sold', "key_factors": ["timing"], "win_loss_assessment": "Loss"}
+).decode()
+EXPECTED = 'He said "buy" \\ then sold'
+
+
+def test_completed_string_field_decodes_escaped_quotes():
+    assert _completed_string_field(DOC, "trade_analysis") == EXPECTED
+
+
+@pytest.mark.parametrize("cut", [5, DOC.index(":") + 1, DOC.index("buy"), DOC.index("then") - 2, DOC.index('","key')])
+def test_completed_string_field_partial(cut):
+    assert _completed_string_field(DOC[:cut], "trade_analysis") is None
+
+
+def test_completed_string_field_escaped_quote_at_end_is_not_closing():
+    assert _completed_string_field('{"trade_analysis": "said \\"', "trade_analysis") is None
+
+
+def test_completed_string_field_missing():
+    assert _completed_string_field('{"key_factors": []}', "trade_analysis") is None
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_scanner_across_chunk_boundaries(size):
+    scanner = _StringFieldScanner("trade_analysis")
+    end = DOC.index('","key') + 1
+    for i in range(0, len(DOC), size):
+        result = scanner.feed(DOC[i : i + size])
+        if result is not None:
+            break
+    assert result == EXPECTED
+    assert i < end <= i + size  # resolved by the chunk holding the closing quote
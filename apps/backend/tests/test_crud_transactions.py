@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from db.crud_transactions import bulk_upsert_transactions
+from db.models import Base, ChartImage, Transaction
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _get(session: Session, contract_id: str) -> Transaction:
+    return session.scalars(select(Transaction).where(Transaction.contract_id == contract_id)).one()
+
+
+def test_duplicate_contract_in_one_batch_is_merged(session):
+    ids = bulk_upsert_transactions(
+        session,
+        [
+            {"user_id": "u1", "contract_id": "c1", "profit": 1, "strategy_intent": {"goal": "trend"}},
+            {"user_id": "u1", "contract_id": "c2", "profit": 5},
+            {"user_id": "u1", "contract_id": "c1", "profit": 2, "run_id": "run-2"},
+        ],
+    )
+    session.commit()
+
+    assert ids[0] == ids[2] != ids[1]
+    tx = _get(session, "c1")
+    assert tx.profit == 2
+    assert tx.run_id == "run-2"
+    assert tx.strategy_intent == {"goal": "trend"}  # not cleared by the later row's None
+    assert session.scalar(select(Transaction.id).where(Transaction.contract_id == "c2")) == ids[1]
+
+
+def test_upsert_keeps_existing_optional_context(session):
+    chart = b"\x89PNG fake"
+    [first] = bulk_upsert_transactions(
+        session,
+        [
+            {
+                "user_id": "u1",
+                "contract_id": "c1",
+                "run_id": "run-1",
+                "strategy_intent": {"goal": "trend"},
+                "behavioral_summary": {"streak": 3},
+                "chart_image": chart,
+                "chart_mime": "image/png",
+            }
+        ],
+    )
+    session.commit()
+    [second] = bulk_upsert_transactions(session, [{"user_id": "u1", "contract_id": "c1", "profit": 9, "run_id": ""}])
+    session.commit()
+    session.expire_all()
+
+    assert second == first
+    tx = _get(session, "c1")
+    assert tx.profit == 9
+    assert tx.run_id == "run-1"
+    assert tx.strategy_intent == {"goal": "trend"}
+    assert tx.behavioral_summary == {"streak": 3}
+    assert tx.chart_mime == "image/png"
+    assert session.get(ChartImage, tx.chart_sha256).image == chart
+
+
+def test_upsert_overwrites_provided_context(session):
+    bulk_upsert_transactions(session, [{"user_id": "u1", "contract_id": "c1", "strategy_intent": {"goal": "a"}}])
+    bulk_upsert_transactions(session, [{"user_id": "u1", "contract_id": "c1", "strategy_intent": {"goal": "b"}}])
+    session.commit()
+    session.expire_all()
+    assert _get(session, "c1").strategy_intent == {"goal": "b"}
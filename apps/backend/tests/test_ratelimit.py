@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+from google.genai import errors
+
+from agents import ratelimit
+from agents.ratelimit import AIMDConcurrency, SlidingWindowLimiter, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def test_sliding_window_waits_for_oldest_request_to_expire(clock):
+    limiter = SlidingWindowLimiter(rpm=2, tpm=1000, window=60)
+
+    async def run():
+        await limiter.acquire(10)
+        clock.now += 5
+        await limiter.acquire(10)
+        await limiter.acquire(10)  # window full: blocks until the first admission ages out
+
+    asyncio.run(run())
+    assert clock.now == 1060.0
+    assert len(limiter._events) == 2
+    assert limiter._tokens == 20
+
+
+def test_sliding_window_token_budget(clock):
+    limiter = SlidingWindowLimiter(rpm=100, tpm=100, window=60)
+
+    async def run():
+        await limiter.acquire(80)
+        await limiter.acquire(30)
+
+    asyncio.run(run())
+    assert clock.now == 1060.0
+    assert limiter._tokens == 30
+
+
+def test_sliding_window_pause(clock):
+    limiter = SlidingWindowLimiter(rpm=100, tpm=1000)
+    limiter.pause_for(2.5)
+    asyncio.run(limiter.acquire(1))
+    assert clock.now == 1002.5
+
+
+def test_aimd_halves_on_congestion_and_recovers_additively():
+    aimd = AIMDConcurrency(c_min=1, c_max=8, alpha=1, beta=0.5, latency_target=1.0)
+
+    async def call(latency: float, throttled: bool = False) -> None:
+        await aimd.acquire()
+        await aimd.release(latency, throttled)
+
+    async def run():
+        await call(0.1, throttled=True)
+        assert aimd.limit == 4
+        await call(5.0)  # over the latency target
+        assert aimd.limit == 2
+        for _ in range(3):
+            await call(5.0)
+        assert aimd.limit == 1  # floored at c_min
+        for _ in range(10):
+            await call(0.1)
+        assert aimd.limit == 8  # capped at c_max
+
+    asyncio.run(run())
+
+
+def _client_error(headers: dict | None = None, details: list | None = None) -> errors.ClientError:
+    response = httpx.Response(429, headers=headers or {})
+    body = {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED", "details": details or []}}
+    return errors.ClientError(429, body, response)
+
+
+def test_retry_after_header():
+    assert retry_after_seconds(_client_error(headers={"Retry-After": "7"})) == 7.0
+
+
+def test_retry_after_from_retry_info_detail():
+    detail = {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "12.5s"}
+    assert retry_after_seconds(_client_error(details=[detail])) == 12.5
+
+
+def test_retry_after_unparseable_header_falls_back_to_detail():
+    detail = {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "3s"}
+    error = _client_error(headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}, details=[detail])
+    assert retry_after_seconds(error) == 3.0
+
+
+def test_retry_after_missing():
+    assert retry_after_seconds(_client_error()) is None
@@ -0,0 +1,46 @@
+import pytest
+
+from agents import response_cache
+from agents.response_cache import ResponseCache, cache_key
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def test_evicts_least_recently_used(now):
+    cache: ResponseCache[str] = ResponseCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # "b" is now least recently used
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_entries_expire_after_ttl(now):
+    cache: ResponseCache[str] = ResponseCache(ttl_seconds=10)
+    cache.set("a", "A")
+    now[0] += 9.9
+    assert cache.get("a") == "A"
+    now[0] += 0.1
+    assert cache.get("a") is None
+    assert "a" not in cache._entries
+
+
+def test_set_refreshes_expiry(now):
+    cache: ResponseCache[str] = ResponseCache(ttl_seconds=10)
+    cache.set("a", "A")
+    now[0] += 8
+    cache.set("a", "A2")
+    now[0] += 8
+    assert cache.get("a") == "A2"
+
+
+def test_cache_key_part_boundaries_do_not_collide():
+    assert cache_key(b"ab", b"c") != cache_key(b"a", b"bc")
+    assert cache_key(b"ab", b"c") == cache_key(b"ab", b"c")
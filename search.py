@@ -175,14 +175,17 @@ def format_docs(docs: List) -> str:
     )
 
 
+# Built once; answer_question reuses it instead of composing runnables per call
+chain = (
+    {"context": retriever | format_docs, "question": RunnablePassthrough()}
+    | prompt
+    | llm
+    | StrOutputParser()
+) if retriever is not None else None
+
+
 def answer_question(question: str) -> str:
-    if retriever is None:
+    if chain is None:
         return "No documents indexed. Add files under ./data first."
 
-    chain = (
-        {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
     return chain.invoke(question)
@@ -7,4 +7,10 @@ import uvicorn
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 
 if __name__ == "__main__":
-    uvicorn.run("search.api:app", host="0.0.0.0", port=8000, reload=True)
+    # Auto-reload only when SEARCH_RELOAD=1 (dev)
+    uvicorn.run(
+        "search.api:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=os.getenv("SEARCH_RELOAD", "").lower() in ("1", "true"),
+    )
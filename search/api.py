@@ -5,36 +5,97 @@ Flow:
     2.  GET  /stream/{id}  → open stream URL, receive SSE tokens
 
 Run:
-    uvicorn search.api:app --reload --port 8000
+    uvicorn search.api:app --port 8000
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import time
 import uuid
-from threading import Lock
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator
 
 # Prevent OpenMP crash on macOS when FAISS + other libs both link libomp
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 
+import orjson
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 
-from search.query.pipeline import answer_question, answer_question_stream
-from search.schemas import QueryRequest, QuerySubmitResponse, RagAnswer
+from search.query.pipeline import aanswer_question, answer_question_stream, warm_up
+from search.schemas import QUERY_REQUEST_ADAPTER, QueryRequest, QuerySubmitResponse, RagAnswer
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 logger = logging.getLogger(__name__)
 
+def _orjson_default(obj):
+    """Types orjson does not encode natively (datetime, UUID and dataclasses it already handles)."""
+    if isinstance(obj, BaseModel):
+        # Model -> JSON bytes in pydantic-core, embedded as-is (no intermediate dict)
+        return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj))
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (fastapi.responses.ORJSONResponse is deprecated in newer FastAPI).
+
+    Returning one directly from a handler skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the FAISS index and model clients once per worker so the first query is not a cold start."""
+    try:
+        await asyncio.to_thread(warm_up)
+        logger.info("Search pipeline warmed up")
+    except FileNotFoundError as e:
+        logger.warning("Skipping warm-up: %s", e)
+    except Exception as e:
+        logger.warning("Warm-up failed, first query will load lazily: %s", e)
+    yield
+
+
 app = FastAPI(
     title="Trading Knowledge Search",
     description="RAG-powered trading knowledge assistant API",
     version="0.2.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+# Query bodies are parsed by QUERY_REQUEST_ADAPTER (not a handler parameter), so the request
+# schema is registered with the OpenAPI components by hand.
+_QUERY_REQUEST_SCHEMA = QUERY_REQUEST_ADAPTER.json_schema(ref_template="#/components/schemas/{model}")
+_QUERY_COMPONENTS = {**_QUERY_REQUEST_SCHEMA.pop("$defs", {}), "QueryRequest": _QUERY_REQUEST_SCHEMA}
+_QUERY_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/QueryRequest"}}},
+    }
+}
+
+
+def _openapi() -> dict:
+    if app.openapi_schema is None:
+        schema = FastAPI.openapi(app)
+        schema.setdefault("components", {}).setdefault("schemas", {}).update(_QUERY_COMPONENTS)
+    return app.openapi_schema
+
+
+app.openapi = _openapi
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -46,51 +107,126 @@ app.add_middleware(
 # ── In-memory job store (replace with Redis later) ──────────────────
 
 _JOB_TTL_SECS = 300  # jobs expire after 5 minutes
-_jobs: dict[str, dict] = {}
-_jobs_lock = Lock()
+_JOB_MAX = 100_000  # oldest jobs are dropped beyond this
+
+# job_id -> (expires_at, request). Every job has the same TTL, so insertion order is expiry
+# order and expired jobs are always at the front. Only touched from the event loop (async
+# endpoints, no awaits in between), so no lock is needed.
+_jobs: OrderedDict[str, tuple[float, QueryRequest]] = OrderedDict()
+
+
+def _evict_expired(now: float) -> None:
+    """Drop expired (and over-capacity) jobs from the front; stops at the first live one."""
+    while _jobs:
+        expires_at, _ = next(iter(_jobs.values()))
+        if expires_at > now and len(_jobs) < _JOB_MAX:
+            break
+        _jobs.popitem(last=False)
 
 
 def _create_job(req: QueryRequest) -> str:
     """Store job params and return a new job_id."""
+    now = time.monotonic()
+    _evict_expired(now)
     job_id = uuid.uuid4().hex[:12]
-    with _jobs_lock:
-        _jobs[job_id] = {
-            "request": req,
-            "created_at": time.time(),
-            "consumed": False,
-        }
+    _jobs[job_id] = (now + _JOB_TTL_SECS, req)
     return job_id
 
 
-def _get_job(job_id: str) -> dict | None:
-    """Retrieve and mark a job as consumed (single-use stream)."""
-    with _jobs_lock:
-        job = _jobs.get(job_id)
-        if job is None:
-            return None
-        if job["consumed"]:
-            return None
-        job["consumed"] = True
-        return job
+def _get_job(job_id: str) -> QueryRequest | None:
+    """Consume a job (single-use stream): pop it so a second GET finds nothing."""
+    entry = _jobs.pop(job_id, None)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
 
 
-def _cleanup_expired() -> None:
-    """Remove expired jobs (called lazily)."""
-    now = time.time()
-    with _jobs_lock:
-        expired = [k for k, v in _jobs.items() if now - v["created_at"] > _JOB_TTL_SECS]
-        for k in expired:
-            del _jobs[k]
+# ── Helpers ──────────────────────────────────────────────────────────
 
 
-# ── Helpers ──────────────────────────────────────────────────────────
+# SSE coalescing: tokens arriving within this window (up to a cap) share one frame / write
+_SSE_MAX_TOKENS = 8
+_SSE_FLUSH_SECS = 0.016
+_SSE_DONE = b"data: [DONE]\n\n"
+_STREAM_END = object()
+
+
+def _sse_frame(text: str) -> bytes:
+    """Encode text as one SSE event; embedded newlines become extra ``data:`` lines (rejoined by the client)."""
+    return ("data: " + text.replace("\n", "\ndata: ") + "\n\n").encode()
+
+
+async def _coalesce(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Yield tokens joined into batches of up to _SSE_MAX_TOKENS, waiting at most _SSE_FLUSH_SECS per batch.
+
+    A pump task reads the source so a timed-out wait never cancels the upstream generator.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _pump() -> None:
+        try:
+            async for token in tokens:
+                await queue.put(token)
+        finally:
+            await queue.put(_STREAM_END)
+
+    pump = asyncio.create_task(_pump())
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            batch = [item]
+            deadline = loop.time() + _SSE_FLUSH_SECS
+            while len(batch) < _SSE_MAX_TOKENS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STREAM_END:
+                    yield "".join(batch)
+                    await pump  # re-raise upstream errors
+                    return
+                batch.append(item)
+            yield "".join(batch)
+        await pump
+    finally:
+        pump.cancel()
+
+
+# Identical bodies (agent retries, repeated overrides, test loops) reuse the validated request.
+# Models are frozen, so one instance can be shared; large bodies bypass the cache.
+_QUERY_CACHE_MAX_BYTES = 16 * 1024
+
+
+@lru_cache(maxsize=256)
+def _validate_query_cached(raw: bytes) -> QueryRequest:
+    return QUERY_REQUEST_ADAPTER.validate_json(raw)
+
+
+async def _parse_query(request: Request) -> QueryRequest:
+    """Validate the raw body with the shared adapter; errors keep FastAPI's 422 shape."""
+    raw = await request.body()
+    try:
+        if len(raw) <= _QUERY_CACHE_MAX_BYTES:
+            return _validate_query_cached(raw)
+        return QUERY_REQUEST_ADAPTER.validate_json(raw)
+    except ValidationError as e:
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors) from e
 
 
 def _prompt_kwargs(req: QueryRequest) -> dict:
     """Extract prompt-override kwargs from the request (if any)."""
-    if req.prompt_overrides is None:
+    overrides = req.prompt_overrides
+    if overrides is None:
         return {}
-    return req.prompt_overrides.model_dump(exclude_none=True)
+    # Flat scalar/list fields: read them off the instance instead of running the serializer
+    return {k: v for k, v in overrides.__dict__.items() if v is not None}
 
 
 # ── Health ───────────────────────────────────────────────────────────
@@ -104,21 +240,21 @@ async def health():
 # ── Submit query → get stream URL ────────────────────────────────────
 
 
-@app.post("/query", response_model=QuerySubmitResponse)
-async def submit_query(req: QueryRequest, request: Request):
+@app.post("/query", response_model=QuerySubmitResponse, openapi_extra=_QUERY_BODY)
+async def submit_query(request: Request):
     """Accept a query and return a stream URL.
 
     The caller (frontend / upstream agent) should open the returned
     ``stream_url`` via GET to receive the answer as Server-Sent Events.
     """
-    _cleanup_expired()
-
+    req = await _parse_query(request)
     job_id = _create_job(req)
     base_url = str(request.base_url).rstrip("/")
     stream_url = f"{base_url}/stream/{job_id}"
 
     logger.info("Job %s created for question: %s", job_id, req.question[:80])
-    return QuerySubmitResponse(job_id=job_id, stream_url=stream_url)
+    # Returned as a response object so orjson encodes it directly (response_model documents the schema)
+    return ORJSONResponse(QuerySubmitResponse(job_id=job_id, stream_url=stream_url))
 
 
 # ── Stream endpoint (GET — EventSource-compatible) ───────────────────
@@ -134,24 +270,24 @@ async def stream(job_id: str):
 
     Each stream URL is single-use; a second GET returns 410 Gone.
     """
-    job = _get_job(job_id)
-    if job is None:
+    req = _get_job(job_id)
+    if req is None:
         raise HTTPException(
             status_code=410,
             detail="Stream not found or already consumed. Submit a new /query.",
         )
 
-    req: QueryRequest = job["request"]
     kwargs = _prompt_kwargs(req)
 
     async def _event_generator():
-        async for token in answer_question_stream(
+        tokens = answer_question_stream(
             question=req.question,
             trade_analysis=req.trade_analysis,
             **kwargs,
-        ):
-            yield f"data: {token}\n\n"
-        yield "data: [DONE]\n\n"
+        )
+        async for text in _coalesce(tokens):
+            yield _sse_frame(text)
+        yield _SSE_DONE
 
     return StreamingResponse(
         _event_generator(),
@@ -166,14 +302,18 @@ async def stream(job_id: str):
 # ── Sync query (convenience / backward compat) ──────────────────────
 
 
-@app.post("/query/sync", response_model=RagAnswer)
-async def query_sync(req: QueryRequest):
+@app.post("/query/sync", response_model=RagAnswer, openapi_extra=_QUERY_BODY)
+async def query_sync(request: Request):
     """Return a complete ``RagAnswer`` JSON response (no streaming).
 
     Use this for testing or when the caller does not need streaming.
     """
-    return answer_question(
+    req = await _parse_query(request)
+    # Embedding + LLM round-trips are awaited on the loop; no worker thread held per request
+    answer = await aanswer_question(
         question=req.question,
         trade_analysis=req.trade_analysis,
         **_prompt_kwargs(req),
     )
+    # Already a validated RagAnswer dump: return it directly instead of re-validating against response_model
+    return ORJSONResponse(answer)
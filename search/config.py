@@ -48,6 +48,24 @@ class Settings(BaseSettings):
     chunk_overlap: int = 120
     top_k: int = 10
 
+    # ── Ingestion ────────────────────────────────────────────────────
+    ingest_workers: int = 0  # HTML parse processes; 0 = one per CPU
+    embed_batch_size: int = 50  # texts per embedding request
+    embed_concurrency: int = 16  # embedding requests in flight; bounded by the provider rate limit
+
+    # ── FAISS index ──────────────────────────────────────────────────
+    # Mid-sized indexes (hnsw_min_vectors up to ivf_min_vectors) use an HNSW graph; smaller stay exact/flat
+    hnsw_min_vectors: int = 1000
+    hnsw_m: int = 32  # graph neighbours per node
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64  # candidates explored per query: higher = better recall, slower
+    # Indexes with at least this many vectors are compressed to IVF-PQ at ingestion
+    ivf_min_vectors: int = 5000
+    ivf_nlist: int = 256
+    ivf_pq_m: int = 16  # sub-quantizers; must divide embedding_dim
+    ivf_pq_nbits: int = 8  # codebook bits; lowered at build time when there are < 39 * 2**nbits vectors
+    ivf_nprobe: int = 8  # lists scanned per query: higher = better recall, slower
+
     # ── Paths (relative to repo root when backend runs from apps/backend) ───────
     data_dir: str = Field(default="data", description="Root folder for HTML sources + url_map.json")
     index_dir: str = Field(default="search_index", description="Folder where FAISS index is persisted")
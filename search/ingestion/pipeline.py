@@ -16,22 +16,31 @@ embeddings to Milvus.  For now everything lands on the filesystem.
 
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import logging
+import os
 import re
+import tempfile
+import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, suppress
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 from langchain_core.documents import Document
 from langchain_text_splitters import (
     MarkdownHeaderTextSplitter,
     RecursiveCharacterTextSplitter,
 )
-from markdownify import markdownify as md
+from markdownify import MarkdownConverter
+import orjson
 
 from search.config import settings
-from search.schemas import DocumentMeta
+from search.schemas import DOC_META_LIST_ADAPTER
 
 logger = logging.getLogger(__name__)
 
@@ -39,66 +48,162 @@ logger = logging.getLogger(__name__)
 # ── HTML → Markdown ──────────────────────────────────────────────────
 
 
-def html_to_clean_markdown(html: str) -> str:
-    """Strip non-content tags and convert HTML to ATX-heading markdown."""
-    import warnings
-    from bs4 import XMLParsedAsHTMLWarning
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
-    warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+# img carries no text once stripped, so it is dropped with the tree cleanup rather than visited by the converter
+_NON_CONTENT_TAGS = ["script", "style", "nav", "footer", "header", "aside", "form", "img"]
+_md_converter = MarkdownConverter(heading_style="ATX", strip=["a"])
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
 
-    soup = BeautifulSoup(html, "lxml")
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside", "form"]):
+
+def html_to_clean_markdown(html: str | bytes) -> str:
+    """Strip non-content tags and convert HTML to ATX-heading markdown.
+
+    Raw file bytes are handed to the parser as-is (decoded as UTF-8 inside lxml).
+    """
+    soup = BeautifulSoup(html, "lxml", from_encoding="utf-8" if isinstance(html, bytes) else None)
+    for tag in soup(_NON_CONTENT_TAGS):
         tag.decompose()
-    markdown = md(str(soup), heading_style="ATX", strip=["img", "a"])
-    return re.sub(r"\n{3,}", "\n\n", markdown).strip()
+    # Convert the cleaned tree directly; md(str(soup)) would serialize it and re-parse with html.parser
+    markdown = _md_converter.convert_soup(soup)
+    return _BLANK_LINES_RE.sub("\n\n", markdown).strip()
 
 
 # ── Document loading ─────────────────────────────────────────────────
 
 
+@lru_cache(maxsize=1)
 def _load_url_map() -> dict:
+    """Parsed url_map.json, read once per process. Shared — callers must not mutate it."""
     if settings.url_map_path.exists():
-        return json.loads(settings.url_map_path.read_text(encoding="utf-8"))
+        return orjson.loads(settings.url_map_path.read_bytes())
     return {}
 
 
+# Bump when html_to_clean_markdown output changes, to invalidate cached conversions
+_DOC_CACHE_VERSION = b"1"
+
+
+def _doc_cache_dir() -> Path:
+    return settings.index_path / "doc_cache"
+
+
+# os.umask can only be read by setting it, so do that once at import rather than per write
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def _atomic_open(path: Path):
+    """Binary file handle for *path* that only replaces it once fully written.
+
+    Writes go to a temp file in the same directory, renamed over *path* with
+    ``os.replace``, so an interrupted run or a concurrent reader never sees a partial file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        # mkstemp creates 0600; give the result the mode a plain open() would have
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def _process_one(path_str: str) -> tuple[str, str]:
+    """Read and convert one HTML file; returns (content hash, markdown).
+
+    Conversions are cached under ``doc_cache/<hash>.md``, so unchanged files skip
+    parsing on later runs. Module-level so worker processes can pickle it.
+    """
+    raw = Path(path_str).read_bytes()
+    digest = hashlib.blake2b(_DOC_CACHE_VERSION + raw, digest_size=16).hexdigest()
+    cached = _doc_cache_dir() / f"{digest}.md"
+    if cached.exists():
+        return digest, cached.read_text(encoding="utf-8")
+    text = html_to_clean_markdown(raw)
+    with _atomic_open(cached) as f:
+        f.write(text.encode("utf-8"))
+    return digest, text
+
+
+def _update_manifest(html_root: Path, paths: List[Path], digests: List[str]) -> None:
+    """Record path -> content hash, log what changed since the last run and prune stale cache entries."""
+    manifest_path = settings.index_path / "manifest.json"
+    previous = orjson.loads(manifest_path.read_bytes()) if manifest_path.exists() else {}
+    manifest = {p.relative_to(html_root).as_posix(): d for p, d in zip(paths, digests)}
+    changed = sum(previous.get(k) != d for k, d in manifest.items())
+    removed = len(previous.keys() - manifest.keys())
+    logger.info("HTML changes since last run: %d new/modified, %d removed", changed, removed)
+
+    live = set(digests)
+    for f in _doc_cache_dir().glob("*.md"):
+        if f.stem not in live:
+            f.unlink()
+    for f in _doc_cache_dir().glob(".*.tmp"):  # left behind by a killed worker
+        f.unlink()
+    manifest_path.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+
 def load_html_documents(html_root: Path | None = None) -> List[Document]:
-    """Recursively load ``*.html`` from *html_root*, convert to markdown Documents."""
+    """Recursively load ``*.html`` from *html_root*, convert to markdown Documents.
+
+    Parsing is CPU-bound, so files are converted across a process pool
+    (``settings.ingest_workers``); results come back in path order.
+    """
     html_root = html_root or settings.html_root
     url_map = _load_url_map()
     docs: List[Document] = []
 
-    for path in sorted(html_root.rglob("*.htm*")):
-        raw = path.read_text(encoding="utf-8", errors="ignore")
-        text = html_to_clean_markdown(raw)
-        if not text:
-            continue
-
-        source_url = ""
-        entry = url_map.get(path.name)
-        if entry:
-            source_url = entry.get("url", "")
-
-        docs.append(
-            Document(
-                page_content=text,
-                metadata={
-                    "source": str(path),
-                    "filename": path.name,
-                    "source_url": source_url,
-                    "format": "html->markdown",
-                },
-            )
-        )
+    paths = sorted(html_root.rglob("*.htm*"))
+    _doc_cache_dir().mkdir(parents=True, exist_ok=True)
+    workers = min(settings.ingest_workers or os.cpu_count() or 1, len(paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_process_one, map(str, paths), chunksize=16))
+    else:
+        results = [_process_one(str(p)) for p in paths]
+    digests = [d for d, _ in results]
+    _update_manifest(html_root, paths, digests)
+
+    for path, (_, text) in zip(paths, results):
+        doc = _to_document(path, text, url_map)
+        if doc is not None:
+            docs.append(doc)
 
     return docs
 
 
+def _to_document(path: Path, text: str, url_map: dict) -> Document | None:
+    """Wrap converted markdown in a Document with source metadata (None for empty pages)."""
+    if not text:
+        return None
+
+    source_url = ""
+    entry = url_map.get(path.name)
+    if entry:
+        source_url = entry.get("url", "")
+
+    return Document(
+        page_content=text,
+        metadata={
+            "source": str(path),
+            "filename": path.name,
+            "source_url": source_url,
+            "format": "html->markdown",
+        },
+    )
+
+
 # ── Chunking ─────────────────────────────────────────────────────────
 
 
-def chunk_documents(docs: List[Document]) -> List[Document]:
-    """Two-stage split: markdown-header-aware, then recursive character."""
+@lru_cache(maxsize=1)
+def _get_splitters() -> tuple[MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter]:
+    """Header and character splitters, built once and reused across documents and runs."""
     md_splitter = MarkdownHeaderTextSplitter(
         headers_to_split_on=[("#", "h1"), ("##", "h2"), ("###", "h3")],
         strip_headers=False,
@@ -107,14 +212,22 @@ def chunk_documents(docs: List[Document]) -> List[Document]:
         chunk_size=settings.chunk_size,
         chunk_overlap=settings.chunk_overlap,
     )
+    return md_splitter, char_splitter
+
+
+def chunk_documents(docs: List[Document]) -> List[Document]:
+    """Two-stage split: markdown-header-aware, then recursive character."""
+    md_splitter, char_splitter = _get_splitters()
 
     chunks: List[Document] = []
+    append = chunks.append
     for doc in docs:
-        header_chunks = md_splitter.split_text(doc.page_content)
-        for hc in header_chunks:
-            hc.metadata = {**doc.metadata, **hc.metadata}
-        sub_chunks = char_splitter.split_documents(header_chunks)
-        chunks.extend(sub_chunks)
+        for hc in md_splitter.split_text(doc.page_content):
+            metadata = {**doc.metadata, **hc.metadata}
+            # Metadata values are flat strings: a shallow copy per chunk replaces
+            # split_documents' per-chunk deepcopy and the intermediate header Documents
+            for text in char_splitter.split_text(hc.page_content):
+                append(Document(page_content=text, metadata=metadata.copy()))
 
     return chunks
 
@@ -122,19 +235,48 @@ def chunk_documents(docs: List[Document]) -> List[Document]:
 # ── Embedding + FAISS persistence ────────────────────────────────────
 
 
-def build_vectorstore(chunks: List[Document]):
-    """Create FAISS vectorstore from chunks and persist to disk."""
-    from langchain_community.vectorstores import FAISS
+def _get_embeddings():
     from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
 
-    embeddings = NVIDIAEmbeddings(
+    return NVIDIAEmbeddings(
         model=settings.embedding_model,
         api_key=settings.api_key,
         base_url=settings.binding_host,
     )
 
-    logger.info("Embedding %d chunks ...", len(chunks))
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+
+def build_vectorstore(chunks: List[Document]):
+    """Create FAISS vectorstore from chunks and persist to disk.
+
+    Safe to call with an event loop already running (Jupyter, async code); there the
+    embedding requests are sent sequentially. Async callers should use ``abuild_vectorstore``.
+    """
+    embeddings = _get_embeddings()
+    texts = [c.page_content for c in chunks]
+    vectors = _embed_with_cache(texts, embeddings)
+    return _save_vectorstore(chunks, vectors, embeddings)
+
+
+async def abuild_vectorstore(chunks: List[Document]):
+    """Async ``build_vectorstore``: embedding requests run concurrently on the caller's loop."""
+    embeddings = _get_embeddings()
+    texts = [c.page_content for c in chunks]
+    vectors = await _aembed_with_cache(texts, embeddings)
+    return await asyncio.to_thread(_save_vectorstore, chunks, vectors, embeddings)
+
+
+def _save_vectorstore(chunks: List[Document], vectors: List[List[float]], embeddings):
+    """Build the FAISS index from precomputed vectors (flat, HNSW or IVF-PQ by size) and persist it."""
+    from langchain_community.vectorstores import FAISS
+
+    texts = [c.page_content for c in chunks]
+    vectorstore = FAISS.from_embeddings(
+        list(zip(texts, vectors)), embeddings, metadatas=[c.metadata for c in chunks]
+    )
+    if vectorstore.index.ntotal >= settings.ivf_min_vectors:
+        vectorstore.index = _to_ivfpq(vectorstore.index)
+    elif vectorstore.index.ntotal >= settings.hnsw_min_vectors:  # fp16 storage
+        vectorstore.index = _to_hnsw(vectorstore.index)
 
     # Persist
     index_path = settings.index_path
@@ -145,34 +287,178 @@ def build_vectorstore(chunks: List[Document]):
     return vectorstore
 
 
+def _embed_with_cache(texts: List[str], embeddings) -> List[List[float]]:
+    """Embed *texts*, reusing vectors from the previous run for chunk texts that did not change
+    and embedding each distinct new text once.
+
+    The cache (``embeddings.npz`` in the index dir: keys + vectors) is keyed on
+    embedding model + chunk text and rewritten with only the current chunks, so incremental
+    corpus updates embed just the new or modified chunks.
+    """
+    keys, cached, missing = _plan_embeddings(texts)
+    if not missing:
+        fresh = []
+    else:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            fresh = asyncio.run(_embed_all(list(missing.values()), embeddings))
+        else:
+            # A loop is already running here (never nest one): fall back to blocking requests
+            fresh = embeddings.embed_documents(list(missing.values()))
+    return _store_embeddings(keys, cached, missing, fresh)
+
+
+async def _aembed_with_cache(texts: List[str], embeddings) -> List[List[float]]:
+    """Async ``_embed_with_cache`` for callers already on an event loop."""
+    keys, cached, missing = _plan_embeddings(texts)
+    fresh = await _embed_all(list(missing.values()), embeddings) if missing else []
+    return await asyncio.to_thread(_store_embeddings, keys, cached, missing, fresh)
+
+
+def _plan_embeddings(texts: List[str]) -> tuple[List[str], dict, dict[str, str]]:
+    """Cache keys for *texts*, the loaded cache, and the unique uncached texts by key."""
+    keys = [_embedding_key(t) for t in texts]
+    cached = _load_embedding_cache()
+
+    # Unique uncached texts only: exact-duplicate chunks (shared boilerplate) share one vector
+    missing: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    logger.info("Embedding %d new chunk texts for %d chunks ...", len(missing), len(texts))
+    return keys, cached, missing
+
+
+def _store_embeddings(
+    keys: List[str], cached: dict, missing: dict[str, str], fresh: List[List[float]]
+) -> List[List[float]]:
+    import numpy as np
+
+    for key, vector in zip(missing, fresh):
+        cached[key] = np.asarray(vector, dtype="float32")
+    return _save_embedding_cache(keys, cached)
+
+
+def _embedding_key(text: str) -> str:
+    model = settings.embedding_model.encode()
+    return hashlib.blake2b(model + b"\0" + text.encode(), digest_size=16).hexdigest()
+
+
+def _load_embedding_cache() -> dict:
+    """Vectors from the previous run, keyed by ``_embedding_key``."""
+    import numpy as np
+
+    cache_path = settings.index_path / "embeddings.npz"
+    if not cache_path.exists():
+        return {}
+    with np.load(cache_path) as data:
+        keys, vectors = data["keys"], data["vectors"]
+    if len(keys) != len(vectors):
+        logger.warning("Embedding cache %s is inconsistent; ignoring it", cache_path)
+        return {}
+    return dict(zip(keys.tolist(), vectors))
+
+
+def _save_embedding_cache(keys: List[str], cached: dict) -> List[List[float]]:
+    """Rewrite the cache with just the current chunks' vectors; returns them in *keys* order."""
+    import numpy as np
+
+    vectors = [cached[k] for k in keys]
+    index_path = settings.index_path
+    index_path.mkdir(parents=True, exist_ok=True)
+    if vectors:
+        # Keys and vectors in one file, replaced atomically, so they can never be mismatched
+        with _atomic_open(index_path / "embeddings.npz") as f:
+            np.savez(f, keys=np.array(keys), vectors=np.stack(vectors).astype("float32"))
+    return [v.tolist() for v in vectors]
+
+
+async def _embed_all(texts: List[str], embeddings) -> List[List[float]]:
+    """Embed *texts* with up to ``settings.embed_concurrency`` batch requests in flight.
+
+    Batches are cut from texts sorted by length so each request carries similar-sized
+    inputs; vectors are returned in the original order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    size = settings.embed_batch_size
+    batches = [order[i : i + size] for i in range(0, len(order), size)]
+    sem = asyncio.Semaphore(settings.embed_concurrency)
+
+    async def _embed_batch(batch: List[int]) -> List[List[float]]:
+        async with sem:
+            return await embeddings.aembed_documents([texts[i] for i in batch])
+
+    results = await asyncio.gather(*(_embed_batch(b) for b in batches))
+    vectors: List[List[float]] = [[] for _ in texts]
+    for batch, batch_vectors in zip(batches, results):
+        for i, vector in zip(batch, batch_vectors):
+            vectors[i] = vector
+    return vectors
+
+
+def _to_hnsw(flat_index):
+    """Re-index a flat L2 index as an HNSW graph over fp16 vectors: logarithmic top-k search,
+    half the disk and page-cache footprint of fp32 at negligible recall cost."""
+    import faiss
+
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    index = faiss.IndexHNSWSQ(flat_index.d, faiss.ScalarQuantizer.QT_fp16, settings.hnsw_m)
+    index.hnsw.efConstruction = settings.hnsw_ef_construction
+    logger.info("Building HNSW fp16 index (M=%d) over %d vectors ...", settings.hnsw_m, len(vectors))
+    index.train(vectors)  # no-op for fp16, but required before add
+    index.add(vectors)
+    index.hnsw.efSearch = settings.hnsw_ef_search
+    return index
+
+
+def _to_ivfpq(flat_index):
+    """Re-index a flat L2 index as IVF-PQ: sub-linear top-k search over compressed vectors."""
+    import faiss
+
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    # FAISS wants ~39 training points per centroid: shrink nlist, and the PQ codebook size
+    # (2**nbits per sub-quantizer), for corpora too small to train the configured ones
+    nlist = max(1, min(settings.ivf_nlist, flat_index.ntotal // 39))
+    nbits = max(1, min(settings.ivf_pq_nbits, (flat_index.ntotal // 39).bit_length() - 1))
+    quantizer = faiss.IndexFlatL2(flat_index.d)
+    index = faiss.IndexIVFPQ(quantizer, flat_index.d, nlist, settings.ivf_pq_m, nbits)
+    logger.info(
+        "Training IVF-PQ index (nlist=%d, m=%d, nbits=%d) on %d vectors ...",
+        nlist, settings.ivf_pq_m, nbits, len(vectors),
+    )
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = settings.ivf_nprobe
+    return index
+
+
 # ── Metadata dump (later → DB) ───────────────────────────────────────
 
 
 def save_doc_metadata(docs: List[Document], chunks: List[Document]) -> Path:
     """Write document-level metadata to JSON (future: PostgreSQL/MySQL)."""
-    chunk_counts: dict[str, int] = {}
-    for c in chunks:
-        fn = c.metadata.get("filename", "")
-        chunk_counts[fn] = chunk_counts.get(fn, 0) + 1
+    chunk_counts = Counter(c.metadata.get("filename", "") for c in chunks)
 
     url_map = _load_url_map()
-    records = []
-    for doc in docs:
+
+    def _record(doc: Document) -> dict:
         fn = doc.metadata["filename"]
         entry = url_map.get(fn, {})
-        records.append(
-            DocumentMeta(
-                filename=fn,
-                source_url=entry.get("url", doc.metadata.get("source_url", "")),
-                source_category=entry.get("source", ""),
-                char_count=len(doc.page_content),
-                chunk_count=chunk_counts.get(fn, 0),
-            ).model_dump()
+        return dict(
+            filename=fn,
+            source_url=entry.get("url", doc.metadata.get("source_url", "")),
+            source_category=entry.get("source", ""),
+            char_count=len(doc.page_content),
+            chunk_count=chunk_counts[fn],
         )
 
+    # Plain dicts validated and serialized as one list: one pydantic-core call each instead of per record
+    records = DOC_META_LIST_ADAPTER.validate_python([_record(doc) for doc in docs])
+
     out = settings.index_path / "documents.json"
     out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(records, indent=2, ensure_ascii=False), encoding="utf-8")
+    out.write_bytes(DOC_META_LIST_ADAPTER.dump_json(records, indent=2))
     logger.info("Document metadata saved to %s (%d docs)", out, len(records))
     return out
 
@@ -180,22 +466,109 @@ def save_doc_metadata(docs: List[Document], chunks: List[Document]) -> Path:
 # ── CLI entrypoint ───────────────────────────────────────────────────
 
 
-def run() -> None:
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+# Items buffered between pipeline stages before the producer waits (backpressure)
+_STAGE_QUEUE_SIZE = 64
+
 
-    logger.info("Loading HTML from %s", settings.html_root)
-    docs = load_html_documents()
-    logger.info("Loaded %d documents", len(docs))
+async def run_async() -> None:
+    """Run ingestion as overlapping stages: load/parse -> chunk -> embed, then index + persist.
 
-    chunks = chunk_documents(docs)
+    Stages are connected by bounded queues, so HTML parsing (process pool), chunking and
+    embedding requests (network) proceed concurrently instead of one after another.
+    Produces the same index, caches and metadata as the sequential functions above.
+    """
+    import numpy as np
+
+    html_root = settings.html_root
+    logger.info("Loading HTML from %s", html_root)
+    paths = sorted(html_root.rglob("*.htm*"))
+    url_map = _load_url_map()
+    _doc_cache_dir().mkdir(parents=True, exist_ok=True)
+    embeddings = _get_embeddings()
+    cached = _load_embedding_cache()
+
+    doc_q: asyncio.Queue[Document | None] = asyncio.Queue(maxsize=_STAGE_QUEUE_SIZE)
+    chunk_q: asyncio.Queue[Document | None] = asyncio.Queue(maxsize=_STAGE_QUEUE_SIZE)
+    digests: List[str] = []
+    docs: List[Document] = []
+    chunks: List[Document] = []
+    keys: List[str] = []
+    embedded = 0
+    loop = asyncio.get_running_loop()
+
+    async def loader(executor) -> None:
+        # Submit every file up front; the pool parses ahead while results are consumed in path order
+        futures = [loop.run_in_executor(executor, _process_one, str(p)) for p in paths]
+        for path, future in zip(paths, futures):
+            digest, text = await future
+            digests.append(digest)
+            doc = _to_document(path, text, url_map)
+            if doc is not None:
+                await doc_q.put(doc)
+        await doc_q.put(None)
+
+    async def chunker() -> None:
+        while (doc := await doc_q.get()) is not None:
+            docs.append(doc)
+            for chunk in chunk_documents([doc]):
+                await chunk_q.put(chunk)
+        await chunk_q.put(None)
+
+    async def embedder() -> None:
+        nonlocal embedded
+        sem = asyncio.Semaphore(settings.embed_concurrency)
+        tasks: List[asyncio.Task] = []
+        batch: List[tuple[str, str]] = []
+        queued: set[str] = set()
+
+        async def _embed_batch(items: List[tuple[str, str]]) -> None:
+            async with sem:
+                vectors = await embeddings.aembed_documents([text for _, text in items])
+            for (key, _), vector in zip(items, vectors):
+                cached[key] = np.asarray(vector, dtype="float32")
+
+        while (chunk := await chunk_q.get()) is not None:
+            chunks.append(chunk)
+            key = _embedding_key(chunk.page_content)
+            keys.append(key)
+            if key in cached or key in queued:
+                continue
+            queued.add(key)
+            batch.append((key, chunk.page_content))
+            if len(batch) == settings.embed_batch_size:
+                tasks.append(asyncio.create_task(_embed_batch(batch)))
+                batch = []
+        if batch:
+            tasks.append(asyncio.create_task(_embed_batch(batch)))
+        await asyncio.gather(*tasks)
+        embedded = len(queued)
+
+    workers = min(settings.ingest_workers or os.cpu_count() or 1, len(paths))
+    # Single worker: parse in the default thread pool rather than paying process start-up
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        await asyncio.gather(loader(executor), chunker(), embedder())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    _update_manifest(html_root, paths, digests)
     logger.info(
-        "Built %d chunks (avg %d chars)",
+        "Loaded %d documents, built %d chunks (avg %d chars), embedded %d new chunk texts",
+        len(docs),
         len(chunks),
         sum(len(c.page_content) for c in chunks) // max(len(chunks), 1),
+        embedded,
     )
 
-    build_vectorstore(chunks)
+    vectors = _save_embedding_cache(keys, cached)
+    _save_vectorstore(chunks, vectors, embeddings)
     save_doc_metadata(docs, chunks)
+
+
+def run() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+    asyncio.run(run_async())
     logger.info("Ingestion complete.")
 
 
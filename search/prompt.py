@@ -15,9 +15,12 @@ expects ``{format_instructions}`` to be ``.partial()``-ed in later.
 
 from __future__ import annotations
 
-import json
+from enum import IntFlag
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional, Sequence, Union
+
+import orjson
 
 # ─────────────────────────────────────────────────────────────────────
 # Load prompt sections from the JSON file next to this module
@@ -26,15 +29,94 @@ from typing import List, Optional
 _PROMPT_JSON = Path(__file__).with_name("prompt.json")
 
 def _load_sections() -> dict:
-    return json.loads(_PROMPT_JSON.read_text(encoding="utf-8"))
+    return orjson.loads(_PROMPT_JSON.read_bytes())
+
+
+def _render_example(ex: dict) -> str:
+    """One few-shot example block.
+
+    JSON braces in expected_output must be escaped ({{ }}) so
+    LangChain doesn't treat them as template variables.
+    """
+    raw_json = orjson.dumps(ex["expected_output"]).decode()
+    return "\n".join(
+        [
+            f"\n### Example — {ex['label']}",
+            f"TRADE_ANALYSIS: {ex['trade_analysis']}",
+            f"QUESTION: {ex['question']}",
+            f"CONTEXT:\n{ex['context']}",
+            raw_json.replace("{", "{{").replace("}", "}}"),
+        ]
+    )
+
+
+def _index_examples(sections: dict) -> dict[Optional[str], list[str]]:
+    """Pre-rendered example blocks: all of them under ``None``, plus one list per difficulty."""
+    blocks: dict[Optional[str], list[str]] = {None: []}
+    for ex in sections["examples"]:
+        block = _render_example(ex)
+        blocks[None].append(block)
+        blocks.setdefault(ex["difficulty"], []).append(block)
+    return blocks
+
 
 PROMPT_SECTIONS: dict = _load_sections()
+_EXAMPLE_BLOCKS = _index_examples(PROMPT_SECTIONS)
+
+# Bumped on every reload so callers caching built prompts can key on it
+_sections_generation = 0
+
+
+def sections_generation() -> int:
+    """Counter identifying the currently loaded ``PROMPT_SECTIONS``."""
+    return _sections_generation
 
 
 def reload_sections() -> None:
     """Hot-reload ``PROMPT_SECTIONS`` from disk (useful during development)."""
-    global PROMPT_SECTIONS
+    global PROMPT_SECTIONS, _EXAMPLE_BLOCKS, _sections_generation
     PROMPT_SECTIONS = _load_sections()
+    _EXAMPLE_BLOCKS = _index_examples(PROMPT_SECTIONS)
+    _sections_generation += 1
+    _build_system_prompt_cached.cache_clear()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Section selection — names resolved once to a bitmask
+# ─────────────────────────────────────────────────────────────────────
+
+
+class Section(IntFlag):
+    """Top-level prompt sections, one bit each; ``sections=[...]`` names map to these."""
+
+    ROLE = 1
+    INPUTS = 2
+    REASONING = 4
+    OUTPUT_SCHEMA = 8
+    RESPONSE_DEPTH = 16
+    TONE = 32
+    RULES = 64
+    EXAMPLES = 128
+
+
+_SECTION_BITS: dict[str, int] = {s.name.lower(): s.value for s in Section}
+ALL_SECTIONS: int = sum(_SECTION_BITS.values())
+
+
+def section_mask(sections: Union[Iterable[str], int, None]) -> int:
+    """Bitmask for a list of section names (``None`` -> all; an int mask passes through).
+
+    Unknown names select nothing, and order / duplicates do not matter, so equal
+    selections always produce the same cache key.
+    """
+    if sections is None:
+        return ALL_SECTIONS
+    if isinstance(sections, int):
+        return sections
+    mask = 0
+    for name in sections:
+        mask |= _SECTION_BITS.get(name, 0)
+    return mask
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -44,10 +126,10 @@ def reload_sections() -> None:
 
 def build_system_prompt(
     *,
-    sections: Optional[List[str]] = None,
+    sections: Union[List[str], int, None] = None,
     difficulty: Optional[str] = None,
     include_examples: bool = True,
-    extra_rules: Optional[List[str]] = None,
+    extra_rules: Optional[Sequence[str]] = None,
     extra_instructions: Optional[str] = None,
 ) -> str:
     """Compose the system prompt from ``PROMPT_SECTIONS``.
@@ -56,7 +138,8 @@ def build_system_prompt(
     ----------
     sections:
         Which top-level keys to include.  ``None`` (default) -> all.
-        Example: ``["role", "rules", "output_schema"]`` for a minimal prompt.
+        Example: ``["role", "rules", "output_schema"]`` for a minimal prompt,
+        or the equivalent ``Section`` mask (see ``section_mask()``).
     difficulty:
         If set, only include the matching response-depth row and filter
         few-shot examples to that difficulty level.  ``None`` -> include all.
@@ -73,21 +156,38 @@ def build_system_prompt(
         Assembled system-prompt template (still contains ``{format_instructions}``
         placeholder for LangChain ``.partial()``).
     """
+    # Memoized per override combination; the section selection is keyed as its bitmask
+    return _build_system_prompt_cached(
+        section_mask(sections),
+        difficulty,
+        include_examples,
+        tuple(extra_rules) if extra_rules else None,
+        extra_instructions,
+    )
+
+
+@lru_cache(maxsize=64)
+def _build_system_prompt_cached(
+    mask: int,
+    difficulty: Optional[str],
+    include_examples: bool,
+    extra_rules: Optional[tuple[str, ...]],
+    extra_instructions: Optional[str],
+) -> str:
     s = PROMPT_SECTIONS
-    _all = sections is None
 
     parts: list[str] = []
 
     # 1. Role
-    if _all or "role" in sections:
+    if mask & Section.ROLE:
         parts.append(s["role"])
 
     # 2. Inputs
-    if _all or "inputs" in sections:
+    if mask & Section.INPUTS:
         parts.append(s["inputs"])
 
     # 3. Reasoning
-    if _all or "reasoning" in sections:
+    if mask & Section.REASONING:
         steps = "\n".join(s["reasoning"])
         parts.append(
             "## Internal reasoning (do NOT output — perform silently before answering)\n"
@@ -95,11 +195,11 @@ def build_system_prompt(
         )
 
     # 4. Output schema
-    if _all or "output_schema" in sections:
+    if mask & Section.OUTPUT_SCHEMA:
         parts.append(s["output_schema"])
 
     # 5. Response depth
-    if _all or "response_depth" in sections:
+    if mask & Section.RESPONSE_DEPTH:
         depth = s["response_depth"]
         header = (
             "## Response-depth guidelines\n\n"
@@ -117,37 +217,25 @@ def build_system_prompt(
         parts.append(header + rows)
 
     # 6. Tone
-    if _all or "tone" in sections:
+    if mask & Section.TONE:
         bullets = "\n".join(f"- {t}" for t in s["tone"])
         parts.append(
             "## Tone & trader-psychology guidelines (avoid defensiveness)\n" + bullets
         )
 
     # 7. Rules
-    if _all or "rules" in sections:
+    if mask & Section.RULES:
         rules = list(s["rules"])
         if extra_rules:
             rules.extend(extra_rules)
         numbered = "\n".join(f"{i}. {r}" for i, r in enumerate(rules, 1))
         parts.append("## Rules\n" + numbered)
 
-    # 8. Examples
-    #    JSON braces in expected_output must be escaped ({{ }}) so
-    #    LangChain doesn't treat them as template variables.
-    if include_examples and (_all or "examples" in sections):
-        examples = s["examples"]
-        if difficulty:
-            examples = [e for e in examples if e["difficulty"] == difficulty]
-        if examples:
-            ex_parts = ["## Few-shot examples"]
-            for ex in examples:
-                ex_parts.append(f"\n### Example — {ex['label']}")
-                ex_parts.append(f"TRADE_ANALYSIS: {ex['trade_analysis']}")
-                ex_parts.append(f"QUESTION: {ex['question']}")
-                ex_parts.append(f"CONTEXT:\n{ex['context']}")
-                raw_json = json.dumps(ex["expected_output"], ensure_ascii=False)
-                ex_parts.append(raw_json.replace("{", "{{").replace("}", "}}"))
-            parts.append("\n".join(ex_parts))
+    # 8. Examples (rendered once at load time, see _index_examples)
+    if include_examples and mask & Section.EXAMPLES:
+        blocks = _EXAMPLE_BLOCKS.get(difficulty or None, [])
+        if blocks:
+            parts.append("\n".join(["## Few-shot examples", *blocks]))
 
     # 9. Extra free-form instructions
     if extra_instructions:
@@ -12,17 +12,19 @@ from __future__ import annotations
 import json
 import logging
 from functools import lru_cache
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Sequence
 
+import orjson
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
 from langchain_openai import ChatOpenAI
 
 from search.config import settings
-from search.prompt import build_system_prompt
+from search.prompt import build_system_prompt, section_mask, sections_generation
 from search.schemas import RagAnswer
 
 logger = logging.getLogger(__name__)
@@ -48,9 +50,24 @@ def _get_vectorstore() -> FAISS:
             f"FAISS index not found at {idx}. "
             "Run ingestion first: python -m search.ingestion"
         )
-    return FAISS.load_local(
-        str(idx), _get_embeddings(), allow_dangerous_deserialization=True
-    )
+    import pickle
+
+    import faiss
+
+    # Memory-map flat vector storage (flat and HNSW indexes) read-only instead of copying it
+    # into each worker's heap; pages come from the shared OS page cache. Read by hand because
+    # FAISS.load_local only forwards io_flags from langchain-community 0.4.2 on.
+    index = faiss.read_index(str(idx / "index.faiss"), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    # index.pkl is written by our own ingestion (FAISS.save_local)
+    with open(idx / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    vs = FAISS(_get_embeddings(), index, docstore, index_to_docstore_id)
+    # Apply the current recall/speed setting to approximate indexes
+    if hasattr(vs.index, "nprobe"):  # IVF (large corpora)
+        vs.index.nprobe = settings.ivf_nprobe
+    elif hasattr(vs.index, "hnsw"):  # HNSW (mid-sized corpora)
+        vs.index.hnsw.efSearch = settings.hnsw_ef_search
+    return vs
 
 
 @lru_cache(maxsize=1)
@@ -63,6 +80,18 @@ def _get_llm() -> ChatOpenAI:
     )
 
 
+def warm_up() -> None:
+    """Load the index and open the embeddings/LLM clients ahead of the first query.
+
+    Blocking (disk + network); call from a worker thread at startup. Raises
+    FileNotFoundError if the index has not been built yet.
+    """
+    _get_retriever()
+    _get_embeddings().embed_query("warm-up")  # TLS handshake + endpoint warm-up
+    _get_chain(_prompt_key())
+    _get_chain(_prompt_key(), parsed=False)
+
+
 # ── Parser ───────────────────────────────────────────────────────────
 
 parser = PydanticOutputParser(pydantic_object=RagAnswer)
@@ -73,10 +102,10 @@ parser = PydanticOutputParser(pydantic_object=RagAnswer)
 
 def _build_prompt(
     *,
-    sections: list[str] | None = None,
+    sections: list[str] | int | None = None,
     difficulty: str | None = None,
     include_examples: bool = True,
-    extra_rules: list[str] | None = None,
+    extra_rules: Sequence[str] | None = None,
     extra_instructions: str | None = None,
 ) -> ChatPromptTemplate:
     """Build a ChatPromptTemplate using selected prompt sections.
@@ -104,27 +133,92 @@ def _build_prompt(
     ).partial(format_instructions=parser.get_format_instructions())
 
 
+# Prompt overrides as a hashable cache key:
+# (sections generation, section mask, difficulty, include_examples, extra_rules, extra_instructions)
+_PromptKey = tuple
+
+
+def _prompt_key(
+    *,
+    sections: list[str] | None = None,
+    difficulty: str | None = None,
+    include_examples: bool = True,
+    extra_rules: list[str] | None = None,
+    extra_instructions: str | None = None,
+) -> _PromptKey:
+    return (
+        sections_generation(),  # reload_sections() invalidates cached chains
+        section_mask(sections),  # order / duplicates of section names share one chain
+        difficulty,
+        include_examples,
+        tuple(extra_rules) if extra_rules else None,  # same normalization as build_system_prompt()
+        extra_instructions,
+    )
+
+
+@lru_cache(maxsize=64)
+def _get_chain(key: _PromptKey, parsed: bool = True) -> Runnable:
+    """Compiled prompt | llm [| parser] chain for one set of prompt overrides.
+
+    Built once per distinct override set, so the system prompt text, template and
+    runnable sequence are not rebuilt on every request.
+    """
+    _, mask, difficulty, include_examples, extra_rules, extra_instructions = key
+    prompt = _build_prompt(
+        sections=mask,
+        difficulty=difficulty,
+        include_examples=include_examples,
+        extra_rules=extra_rules,
+        extra_instructions=extra_instructions,
+    )
+    if parsed:
+        return prompt | _get_llm() | parser
+    return prompt | _get_llm()  # no parser — stream raw tokens
+
+
+@lru_cache(maxsize=1)
+def _get_retriever():
+    return _get_vectorstore().as_retriever(search_kwargs={"k": settings.top_k})
+
+
 # ── Helpers ──────────────────────────────────────────────────────────
 
 
 def _format_docs(docs: List[Document]) -> str:
-    """Build a labelled context string from retrieved chunks."""
+    """Build a labelled context string from retrieved chunks, skipping repeated chunk text."""
     parts: list[str] = []
+    seen: set[int] = set()  # in-process str hashes; cached on the string, so no copy or rehash
     for doc in docs:
-        label = doc.metadata.get("source_url") or doc.metadata.get("filename", "unknown")
-        parts.append(f"[{label}]\n{doc.page_content}")
+        sig = hash(doc.page_content)
+        if sig in seen:
+            continue
+        seen.add(sig)
+        m = doc.metadata
+        label = m.get("source_url") or m.get("filename", "unknown")
+        # Header keys set by chunk_documents' MarkdownHeaderTextSplitter
+        headers = " > ".join(filter(None, (m.get("h1"), m.get("h2"), m.get("h3"))))
+        if headers:
+            parts.append(f"[{label}]\nSection: {headers}\n{doc.page_content}")
+        else:
+            parts.append(f"[{label}]\n{doc.page_content}")
     return "\n\n".join(parts)
 
 
 def _default_answer() -> dict:
-    return RagAnswer(
+    # Constant, known-valid fields: model_construct skips validation. Only use it on
+    # data proven valid upstream; LLM output is still validated by the output parser.
+    return RagAnswer.model_construct(
         difficulty="unknown",
         answer="INSUFFICIENT_CONTEXT",
         confidence="low",
-        sources=[],
+        sources=(),
     ).model_dump()
 
 
+# Streamed as-is when there is no index or nothing was retrieved
+_DEFAULT_ANSWER_JSON = orjson.dumps(_default_answer()).decode()
+
+
 # ── Public API ───────────────────────────────────────────────────────
 
 
@@ -158,12 +252,11 @@ def answer_question(
         Free-form text appended to the prompt.
     """
     try:
-        vs = _get_vectorstore()
+        retriever = _get_retriever()
     except FileNotFoundError:
         logger.warning("No FAISS index; returning default answer.")
         return _default_answer()
 
-    retriever = vs.as_retriever(search_kwargs={"k": settings.top_k})
     docs = retriever.invoke(question)
 
     if not docs:
@@ -171,15 +264,15 @@ def answer_question(
 
     context_str = _format_docs(docs)
 
-    prompt = _build_prompt(
-        sections=sections,
-        difficulty=difficulty,
-        include_examples=include_examples,
-        extra_rules=extra_rules,
-        extra_instructions=extra_instructions,
+    chain = _get_chain(
+        _prompt_key(
+            sections=sections,
+            difficulty=difficulty,
+            include_examples=include_examples,
+            extra_rules=extra_rules,
+            extra_instructions=extra_instructions,
+        )
     )
-
-    chain = prompt | _get_llm() | parser
     result: RagAnswer = chain.invoke(
         {
             "question": question,
@@ -190,6 +283,51 @@ def answer_question(
     return result.model_dump()
 
 
+async def aanswer_question(
+    question: str,
+    trade_analysis: str = "none",
+    *,
+    difficulty: str | None = None,
+    sections: list[str] | None = None,
+    include_examples: bool = True,
+    extra_rules: list[str] | None = None,
+    extra_instructions: str | None = None,
+) -> dict:
+    """Async variant of ``answer_question()`` for callers already on an event loop.
+
+    The query embedding and LLM call are awaited instead of holding a worker
+    thread for the whole round-trip.
+    """
+    try:
+        retriever = _get_retriever()
+    except FileNotFoundError:
+        logger.warning("No FAISS index; returning default answer.")
+        return _default_answer()
+
+    docs = await retriever.ainvoke(question)
+
+    if not docs:
+        return _default_answer()
+
+    chain = _get_chain(
+        _prompt_key(
+            sections=sections,
+            difficulty=difficulty,
+            include_examples=include_examples,
+            extra_rules=extra_rules,
+            extra_instructions=extra_instructions,
+        )
+    )
+    result: RagAnswer = await chain.ainvoke(
+        {
+            "question": question,
+            "trade_analysis": trade_analysis,
+            "context": _format_docs(docs),
+        }
+    )
+    return result.model_dump()
+
+
 async def answer_question_stream(
     question: str,
     trade_analysis: str = "none",
@@ -206,27 +344,27 @@ async def answer_question_stream(
     The final concatenated output is a valid ``RagAnswer`` JSON string.
     """
     try:
-        vs = _get_vectorstore()
+        retriever = _get_retriever()
     except FileNotFoundError:
-        yield json.dumps(_default_answer())
+        yield _DEFAULT_ANSWER_JSON
         return
 
-    retriever = vs.as_retriever(search_kwargs={"k": settings.top_k})
-    docs = retriever.invoke(question)
+    docs = await retriever.ainvoke(question)  # embedding call + FAISS search off the event loop
 
     if not docs:
-        yield json.dumps(_default_answer())
+        yield _DEFAULT_ANSWER_JSON
         return
 
-    prompt = _build_prompt(
-        sections=sections,
-        difficulty=difficulty,
-        include_examples=include_examples,
-        extra_rules=extra_rules,
-        extra_instructions=extra_instructions,
+    chain = _get_chain(
+        _prompt_key(
+            sections=sections,
+            difficulty=difficulty,
+            include_examples=include_examples,
+            extra_rules=extra_rules,
+            extra_instructions=extra_instructions,
+        ),
+        parsed=False,
     )
-
-    chain = prompt | _get_llm()  # no parser — stream raw tokens
     async for chunk in chain.astream(
         {
             "question": question,
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 # ── API request / response ───────────────────────────────────────────
@@ -16,6 +16,7 @@ class PromptOverrides(BaseModel):
     Every field maps to a ``build_system_prompt()`` parameter so that the
     calling agent (or a middleware) can tailor the prompt at request time.
     """
+    model_config = ConfigDict(frozen=True)
 
     difficulty: str | None = Field(
         default=None,
@@ -24,7 +25,7 @@ class PromptOverrides(BaseModel):
             "few-shot examples for this level (beginner / intermediate / advanced)."
         ),
     )
-    sections: list[str] | None = Field(
+    sections: tuple[str, ...] | None = Field(
         default=None,
         description=(
             "Which prompt sections to include. "
@@ -35,7 +36,7 @@ class PromptOverrides(BaseModel):
         default=True,
         description="Whether to attach few-shot examples to the prompt.",
     )
-    extra_rules: list[str] | None = Field(
+    extra_rules: tuple[str, ...] | None = Field(
         default=None,
         description="Additional rules injected after the base rules list.",
     )
@@ -47,6 +48,7 @@ class PromptOverrides(BaseModel):
 
 class QueryRequest(BaseModel):
     """Incoming query from the upstream agent."""
+    model_config = ConfigDict(frozen=True)
 
     question: str = Field(..., description="Knowledge question to answer")
     trade_analysis: str = Field(
@@ -65,8 +67,13 @@ class QueryRequest(BaseModel):
     )
 
 
+# Built once at import: reusing a validator avoids rebuilding its core schema per request
+QUERY_REQUEST_ADAPTER = TypeAdapter(QueryRequest)
+
+
 class RagAnswer(BaseModel):
     """Structured answer returned by the RAG pipeline."""
+    model_config = ConfigDict(frozen=True)
 
     difficulty: Literal["beginner", "intermediate", "advanced", "unknown"] = Field(
         description="Difficulty level inferred from the question"
@@ -77,14 +84,15 @@ class RagAnswer(BaseModel):
     confidence: Literal["high", "medium", "low"] = Field(
         description="Confidence based on context coverage"
     )
-    sources: list[str] = Field(
-        default_factory=list,
+    sources: tuple[str, ...] = Field(
+        default=(),
         description="Source URLs (or filenames when URL unavailable)",
     )
 
 
 class QuerySubmitResponse(BaseModel):
     """Returned by POST /query — contains the stream URL for the client."""
+    model_config = ConfigDict(frozen=True)
 
     job_id: str = Field(description="Unique job identifier")
     stream_url: str = Field(description="GET this URL to receive the SSE stream")
@@ -95,9 +103,20 @@ class QuerySubmitResponse(BaseModel):
 
 class DocumentMeta(BaseModel):
     """Metadata for a single ingested document."""
+    model_config = ConfigDict(frozen=True)
 
     filename: str
     source_url: str = ""
     source_category: str = ""
     char_count: int = 0
     chunk_count: int = 0
+
+
+DOC_META_LIST_ADAPTER = TypeAdapter(list[DocumentMeta])
+
+
+# Core schemas are built at class creation; one dry run pays the remaining first-call
+# costs of the request validator and response serializers at import, not on the first /query.
+QUERY_REQUEST_ADAPTER.validate_json(b'{"question": ""}')
+RagAnswer.model_construct(difficulty="unknown", answer="", confidence="low", sources=()).model_dump(mode="json")
+QuerySubmitResponse.model_construct(job_id="", stream_url="").model_dump(mode="json")